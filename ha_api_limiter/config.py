@@ -1,11 +1,14 @@
 """Configuration management for HA API Limiter."""
 
 import fnmatch
+import functools
 import os
 import re
 import shutil
+import sys
 import tempfile
 import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from enum import Enum
 from pathlib import Path
 from typing import Any
@@ -16,9 +19,88 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 from ruamel.yaml import YAML
 from ruamel.yaml.comments import CommentedSeq
 
+try:
+    # Prefer the libyaml-backed loader when PyYAML was built with it
+    from yaml import CSafeLoader as YAMLLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader as YAMLLoader  # type: ignore[assignment]
+
+try:
+    # Linear-time matching for the combined endpoint alternation, when installed
+    import re2
+except ImportError:  # pragma: no cover
+    re2 = None
+
 # Base config.yaml location (project root)
 BASE_CONFIG_PATH = Path(__file__).parent.parent / "config.yaml"
 
+# Maximum number of memoized whitelist decisions per lookup type
+MATCH_CACHE_SIZE = 16384
+
+
+def _compile_alternation(pattern: str) -> re.Pattern:
+    """Compile an endpoint alternation, with RE2 when available."""
+    # Endpoint patterns only use escapes, [^/]+, .* and anchors, all valid in RE2;
+    # fall back to re anyway rather than fail if a pattern is ever rejected
+    if re2 is not None:
+        try:
+            return re2.compile(pattern)
+        except re2.error:  # pragma: no cover
+            pass
+    return re.compile(pattern)
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_config(content: bytes) -> dict[str, Any]:
+    """Parse YAML config content, memoized on the content itself."""
+    return yaml.load(content, Loader=YAMLLoader) or {}
+
+
+def _is_glob(pattern: str) -> bool:
+    """Check if a whitelist entry contains fnmatch wildcard characters."""
+    return "*" in pattern or "?" in pattern or "[" in pattern
+
+
+def _glob_prefix(pattern: str) -> str | None:
+    """Return the prefix of a "prefix*" wildcard pattern, or None for any other shape."""
+    if pattern.endswith("*") and not _is_glob(pattern[:-1]):
+        return pattern[:-1]
+    return None
+
+
+def _compile_globs(globs: set[str]) -> tuple[tuple[str, ...], re.Pattern | None]:
+    """Compile fnmatch-style wildcard patterns for matching.
+
+    Plain "prefix*" patterns, by far the most common shape, are returned as a tuple
+    for str.startswith; the rest are joined into one alternation (None when empty).
+    """
+    prefixes: list[str] = []
+    others: list[str] = []
+    for glob in sorted(globs):
+        prefix = _glob_prefix(glob)
+        if prefix is not None:
+            prefixes.append(prefix)
+        else:
+            others.append(fnmatch.translate(glob))
+    combined = re.compile("|".join(others)) if others else None
+    return tuple(prefixes), combined
+
+
+def _partition_patterns(patterns: list[str]) -> tuple[set[str], set[str]]:
+    """Split whitelist entries into exact IDs and wildcard patterns.
+
+    Exact IDs are interned, matching what the ``add_*`` methods do for learned
+    entries, so IDs loaded from the file share one copy with learned ones.
+    """
+    exact: set[str] = set()
+    globs: set[str] = set()
+    for pattern in patterns:
+        if _is_glob(pattern):
+            globs.add(pattern)
+        else:
+            exact.add(sys.intern(pattern))
+    return exact, globs
+
 
 class Mode(str, Enum):
     """Operating mode for the proxy."""
@@ -37,191 +119,509 @@ class Settings(BaseSettings):
     config_path: Path = Field(default=Path("./config.yaml"), description="Path to whitelist config")
     port: int = Field(default=8080, description="Proxy listen port")
     host: str = Field(default="0.0.0.0", description="Proxy listen host")
+    always_allow_prefixes: tuple[str, ...] = Field(
+        default=("/static/", "/frontend_latest/"),
+        description="Path prefixes proxied in limit mode without a whitelist check",
+    )
 
 
 class WhitelistConfig:
     """Manages the whitelist configuration for endpoints and entities."""
 
+    __slots__ = (
+        "config_path",
+        "_endpoints",
+        "_entities",
+        "_devices",
+        "_areas",
+        "_endpoint_literals",
+        "_endpoint_prefixes",
+        "_endpoint_patterns",
+        "_endpoint_combined",
+        "_endpoint_combined_count",
+        "_entity_set",
+        "_entity_globs",
+        "_entity_glob_prefixes",
+        "_entity_glob_re",
+        "_device_set",
+        "_device_globs",
+        "_device_glob_prefixes",
+        "_device_glob_re",
+        "_area_set",
+        "_area_globs",
+        "_area_glob_prefixes",
+        "_area_glob_re",
+        "_endpoint_allowed",
+        "_entity_allowed",
+        "_device_allowed",
+        "_area_allowed",
+        "_save_lock",
+        "_save_executor",
+        "_save_future",
+        "_dirty",
+        "_version",
+        "_allowed_ws_types",
+        "_allowed_event_types",
+        "_allowed_services",
+    )
+
     def __init__(self, config_path: Path | None = None):
         self.config_path = config_path
+        # Memoized whitelist decisions, cleared whenever the patterns change
+        self._endpoint_allowed = functools.lru_cache(maxsize=MATCH_CACHE_SIZE)(self._match_endpoint)
+        self._entity_allowed = functools.lru_cache(maxsize=MATCH_CACHE_SIZE)(self._match_entity)
+        self._device_allowed = functools.lru_cache(maxsize=MATCH_CACHE_SIZE)(self._match_device)
+        self._area_allowed = functools.lru_cache(maxsize=MATCH_CACHE_SIZE)(self._match_area)
+        # Bumped on every whitelist change so callers can key their own caches on it
+        self._version = 0
         self.endpoints: list[str] = []
         self.entities: list[str] = []
         self.devices: list[str] = []
         self.areas: list[str] = []
+        # Endpoints without placeholders or wildcards, matched by set lookup
+        self._endpoint_literals: set[str] = set()
+        # Prefixes of plain "/prefix/*" endpoints, matched with str.startswith
+        self._endpoint_prefixes: tuple[str, ...] = ()
         self._endpoint_patterns: list[re.Pattern] = []
+        # All endpoint patterns joined into one alternation (None when empty)
+        self._endpoint_combined: re.Pattern | None = None
+        # Number of leading _endpoint_patterns folded into _endpoint_combined
+        self._endpoint_combined_count = 0
         self._save_lock = threading.Lock()
+        # Single worker so background saves run one at a time off the event loop
+        self._save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whitelist-save")
+        self._save_future: Future[None] | None = None
+        # Whether in-memory entries may differ from the file (cleared by load/save)
+        self._dirty = True
         # Advanced WebSocket security overrides
         self.allowed_ws_types: list[str] = []
         self.allowed_event_types: list[str] = []
         self.allowed_services: list[str] = []
 
+    @property
+    def version(self) -> int:
+        """Counter that changes whenever the whitelist entries change."""
+        return self._version
+
+    @property
+    def dirty(self) -> bool:
+        """Whether the whitelist may have changed since it was last loaded or saved."""
+        return self._dirty
+
+    @property
+    def endpoints(self) -> list[str]:
+        """Whitelisted endpoint patterns."""
+        return self._endpoints
+
+    @endpoints.setter
+    def endpoints(self, value: list[str]) -> None:
+        self._endpoints = value
+        self._dirty = True
+
+    @property
+    def entities(self) -> list[str]:
+        """Whitelisted entity IDs and wildcard patterns.
+
+        Matching uses indexes built when the list is assigned, so change it through
+        add_entity() or by assigning a new list; editing it in place has no effect.
+        """
+        return self._entities
+
+    @entities.setter
+    def entities(self, value: list[str]) -> None:
+        self._entities = value
+        self._dirty = True
+        self._entity_set, self._entity_globs = _partition_patterns(value)
+        self._entity_glob_prefixes, self._entity_glob_re = _compile_globs(self._entity_globs)
+        self._entity_allowed.cache_clear()
+        self._version += 1
+
+    @property
+    def devices(self) -> list[str]:
+        """Whitelisted device IDs and wildcard patterns.
+
+        Matching uses indexes built when the list is assigned, so change it through
+        add_device() or by assigning a new list; editing it in place has no effect.
+        """
+        return self._devices
+
+    @devices.setter
+    def devices(self, value: list[str]) -> None:
+        self._devices = value
+        self._dirty = True
+        self._device_set, self._device_globs = _partition_patterns(value)
+        self._device_glob_prefixes, self._device_glob_re = _compile_globs(self._device_globs)
+        self._device_allowed.cache_clear()
+        self._version += 1
+
+    @property
+    def areas(self) -> list[str]:
+        """Whitelisted area IDs and wildcard patterns.
+
+        Matching uses indexes built when the list is assigned, so change it through
+        add_area() or by assigning a new list; editing it in place has no effect.
+        """
+        return self._areas
+
+    @areas.setter
+    def areas(self, value: list[str]) -> None:
+        self._areas = value
+        self._dirty = True
+        self._area_set, self._area_globs = _partition_patterns(value)
+        self._area_glob_prefixes, self._area_glob_re = _compile_globs(self._area_globs)
+        self._area_allowed.cache_clear()
+        self._version += 1
+
+    @property
+    def allowed_ws_types(self) -> list[str]:
+        """WebSocket message types allowed despite the built-in block list.
+
+        Assign a new list to change it; in-place edits don't reach memoized decisions.
+        """
+        return self._allowed_ws_types
+
+    @allowed_ws_types.setter
+    def allowed_ws_types(self, value: list[str]) -> None:
+        self._allowed_ws_types = value
+        self._version += 1
+
+    @property
+    def allowed_event_types(self) -> list[str]:
+        """Event types allowed for subscribe_events beyond the built-in ones.
+
+        Assign a new list to change it; in-place edits don't reach memoized decisions.
+        """
+        return self._allowed_event_types
+
+    @allowed_event_types.setter
+    def allowed_event_types(self, value: list[str]) -> None:
+        self._allowed_event_types = value
+        self._version += 1
+
+    @property
+    def allowed_services(self) -> list[str]:
+        """Services (domain.service or domain.*) allowed despite the built-in block list.
+
+        Assign a new list to change it; in-place edits don't reach memoized decisions.
+        """
+        return self._allowed_services
+
+    @allowed_services.setter
+    def allowed_services(self, value: list[str]) -> None:
+        self._allowed_services = value
+        self._version += 1
+
     def load(self) -> None:
         """Load whitelist from config file."""
         if self.config_path and self.config_path.exists():
-            with open(self.config_path) as f:
-                data = yaml.safe_load(f) or {}
-            # Ensure we always have lists, even if YAML has null values
-            self.endpoints = data.get("endpoints") or []
-            self.entities = data.get("entities") or []
-            self.devices = data.get("devices") or []
-            self.areas = data.get("areas") or []
+            # Reloading an unchanged file reuses the parse. The cache is keyed on the
+            # bytes, so any edit is seen whatever the timestamp resolution
+            data = _parse_config(self.config_path.read_bytes())
+            # Ensure we always have lists, even if YAML has null values. The lists are
+            # copied so add_* never modifies the memoized parse
+            self.endpoints = list(data.get("endpoints") or [])
+            self.entities = list(data.get("entities") or [])
+            self.devices = list(data.get("devices") or [])
+            self.areas = list(data.get("areas") or [])
             # Advanced WebSocket security overrides
-            self.allowed_ws_types = data.get("allowed_ws_types") or []
-            self.allowed_event_types = data.get("allowed_event_types") or []
-            self.allowed_services = data.get("allowed_services") or []
+            self.allowed_ws_types = list(data.get("allowed_ws_types") or [])
+            self.allowed_event_types = list(data.get("allowed_event_types") or [])
+            self.allowed_services = list(data.get("allowed_services") or [])
             self._compile_endpoint_patterns()
+            self._dirty = False
 
     def save(self) -> None:
         """Save current whitelist to config file, preserving comments.
 
         Uses atomic writes and a lock to prevent corruption from concurrent saves.
         """
-        if not self.config_path:
+        if not self.config_path or not self._dirty:
             return
 
         with self._save_lock:
-            self.config_path.parent.mkdir(parents=True, exist_ok=True)
-
-            ruamel = YAML()
-            ruamel.preserve_quotes = True
-            ruamel.indent(mapping=2, sequence=2, offset=2)
-
-            # If config doesn't exist, copy base config.yaml as template
-            if not self.config_path.exists() and BASE_CONFIG_PATH.exists():
-                shutil.copy(BASE_CONFIG_PATH, self.config_path)
-
-            # Load existing file to preserve comments and structure
-            if self.config_path.exists():
-                with open(self.config_path) as f:
-                    data = ruamel.load(f)
-                if data is None:
-                    data = {}
-            else:
-                data = {}
-
-            # Helper to append items to a list, creating if needed
-            def append_items(key: str, items: list[str]) -> None:
-                existing = list(data.get(key) or [])
-                new_items = [item for item in items if item not in existing]
-                if not new_items:
-                    return
-
-                if key in data:
-                    if isinstance(data[key], CommentedSeq):
-                        # Append to existing CommentedSeq to preserve structure
-                        for item in sorted(new_items):
-                            data[key].append(item)
-                    else:
-                        # Convert empty list to CommentedSeq and append in place
-                        seq = CommentedSeq(existing + sorted(new_items))
-                        data[key] = seq
-                else:
-                    # Key doesn't exist, create new list
-                    data[key] = existing + sorted(new_items)
-
-            append_items("endpoints", self.endpoints)
-            append_items("entities", self.entities)
-            append_items("devices", self.devices)
-            append_items("areas", self.areas)
-
-            # Atomic write: write to temp file, then rename
-            parent_dir = self.config_path.parent
-            fd, tmp_path = tempfile.mkstemp(suffix=".yaml", prefix=".config_", dir=parent_dir)
+            # Cleared before the lists are read, so entries added while a background
+            # save is writing mark the whitelist dirty again
+            self._dirty = False
             try:
-                with os.fdopen(fd, "w") as f:
-                    ruamel.dump(data, f)
-                # Atomic rename (on POSIX systems)
-                os.replace(tmp_path, self.config_path)
+                self._write(self.config_path)
             except Exception:
-                # Clean up temp file on failure
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
+                self._dirty = True
                 raise
 
+    def save_in_background(self) -> Future[None]:
+        """Run save() on the background save thread.
+
+        Returns the pending future instead of queueing another save if one has not
+        finished yet; anything it misses keeps the whitelist dirty for the next save.
+        """
+        future = self._save_future
+        if future is None or future.done():
+            future = self._save_future = self._save_executor.submit(self.save)
+        return future
+
+    def _write(self, config_path: Path) -> None:
+        """Merge the whitelist into the config file with an atomic write."""
+        config_path.parent.mkdir(parents=True, exist_ok=True)
+
+        ruamel = YAML()
+        ruamel.preserve_quotes = True
+        ruamel.indent(mapping=2, sequence=2, offset=2)
+
+        # If config doesn't exist, copy base config.yaml as template
+        if not config_path.exists() and BASE_CONFIG_PATH.exists():
+            shutil.copy(BASE_CONFIG_PATH, config_path)
+
+        # Load existing file to preserve comments and structure
+        if config_path.exists():
+            with open(config_path) as f:
+                data = ruamel.load(f)
+            if data is None:
+                data = {}
+        else:
+            data = {}
+
+        # Helper to append items to a list, creating if needed
+        def append_items(key: str, items: list[str]) -> None:
+            existing = list(data.get(key) or [])
+            existing_set = set(existing)
+            new_items = [item for item in items if item not in existing_set]
+            if not new_items:
+                return
+
+            if key in data:
+                if isinstance(data[key], CommentedSeq):
+                    # Append to existing CommentedSeq to preserve structure
+                    for item in sorted(new_items):
+                        data[key].append(item)
+                else:
+                    # Convert empty list to CommentedSeq and append in place
+                    seq = CommentedSeq(existing + sorted(new_items))
+                    data[key] = seq
+            else:
+                # Key doesn't exist, create new list
+                data[key] = existing + sorted(new_items)
+
+        append_items("endpoints", list(self.endpoints))
+        append_items("entities", list(self.entities))
+        append_items("devices", list(self.devices))
+        append_items("areas", list(self.areas))
+
+        # Atomic write: write to temp file, then rename
+        parent_dir = config_path.parent
+        fd, tmp_path = tempfile.mkstemp(suffix=".yaml", prefix=".config_", dir=parent_dir)
+        try:
+            with os.fdopen(fd, "w") as f:
+                ruamel.dump(data, f)
+            # Atomic rename (on POSIX systems)
+            os.replace(tmp_path, config_path)
+        except Exception:
+            # Clean up temp file on failure
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    @staticmethod
+    def _is_endpoint_literal(endpoint: str) -> bool:
+        """Check if an endpoint has no {param} placeholders or * wildcards."""
+        return "{" not in endpoint and "*" not in endpoint
+
+    @staticmethod
+    def _endpoint_prefix(endpoint: str) -> str | None:
+        """Return the prefix of a plain "/prefix/*" endpoint, or None for any other shape."""
+        if endpoint.endswith("*") and "{" not in endpoint and "*" not in endpoint[:-1]:
+            return endpoint[:-1]
+        return None
+
+    @staticmethod
+    def _compile_endpoint_pattern(endpoint: str) -> re.Pattern:
+        """Compile a single endpoint pattern to an anchored regex."""
+        # First replace {param} placeholders with a marker
+        # Then escape, then replace marker with regex
+        marker = "__PARAM__"
+        temp = re.sub(r"\{[^}]+\}", marker, endpoint)
+        pattern = re.escape(temp)
+        pattern = pattern.replace(marker, "[^/]+")
+        pattern = pattern.replace(r"\*", ".*")
+        return re.compile(f"^{pattern}$")
+
     def _compile_endpoint_patterns(self) -> None:
         """Compile endpoint patterns to regex for matching."""
-        self._endpoint_patterns = []
-        for endpoint in self.endpoints:
-            # First replace {param} placeholders with a marker
-            # Then escape, then replace marker with regex
-            marker = "__PARAM__"
-            temp = re.sub(r"\{[^}]+\}", marker, endpoint)
-            pattern = re.escape(temp)
-            pattern = pattern.replace(marker, "[^/]+")
-            pattern = pattern.replace(r"\*", ".*")
-            self._endpoint_patterns.append(re.compile(f"^{pattern}$"))
+        self._endpoint_literals = {e for e in self.endpoints if self._is_endpoint_literal(e)}
+        self._endpoint_prefixes = tuple(
+            prefix for e in self.endpoints if (prefix := self._endpoint_prefix(e)) is not None
+        )
+        self._endpoint_patterns = [
+            self._compile_endpoint_pattern(e)
+            for e in self.endpoints
+            if not self._is_endpoint_literal(e) and self._endpoint_prefix(e) is None
+        ]
+        self._combine_endpoint_patterns()
+        self._endpoint_allowed.cache_clear()
+        self._version += 1
+
+    def _combine_endpoint_patterns(self) -> None:
+        """Join the individual endpoint patterns into a single alternation."""
+        if self._endpoint_patterns:
+            combined = "|".join(f"(?:{p.pattern})" for p in self._endpoint_patterns)
+            self._endpoint_combined = _compile_alternation(combined)
+        else:
+            self._endpoint_combined = None
+        self._endpoint_combined_count = len(self._endpoint_patterns)
 
     def add_endpoint(self, endpoint: str) -> bool:
         """Add an endpoint to the whitelist. Returns True if newly added."""
-        # Skip if already in list
-        if endpoint in self.endpoints:
-            return False
-        # Skip if already covered by an existing pattern (e.g., wildcard)
-        if self.is_endpoint_allowed(endpoint):
+        # Skip if already listed or covered by an existing pattern (e.g., wildcard);
+        # a pattern always matches its own text, so this also catches duplicates
+        if self._is_endpoint_covered(endpoint):
             return False
         self.endpoints.append(endpoint)
-        self._compile_endpoint_patterns()
+        if self._is_endpoint_literal(endpoint):
+            self._endpoint_literals.add(endpoint)
+        elif (prefix := self._endpoint_prefix(endpoint)) is not None:
+            self._endpoint_prefixes += (prefix,)
+        else:
+            # Compile only the new pattern; the alternation is rebuilt on next lookup
+            self._endpoint_patterns.append(self._compile_endpoint_pattern(endpoint))
+        self._endpoint_allowed.cache_clear()
+        self._version += 1
+        self._dirty = True
         return True
 
+    def _is_endpoint_covered(self, endpoint: str) -> bool:
+        """Check if an endpoint is covered without forcing an alternation rebuild.
+
+        Patterns added since the last rebuild are matched individually, so a burst
+        of learned endpoints doesn't recompile the alternation on every insert.
+        """
+        if endpoint in self._endpoint_literals or self._match_endpoint_prefix(endpoint):
+            return True
+        combined = self._endpoint_combined
+        if combined is not None and combined.match(endpoint):
+            return True
+        for pattern in self._endpoint_patterns[self._endpoint_combined_count :]:
+            if pattern.match(endpoint):
+                return True
+        return False
+
     def add_entity(self, entity_id: str) -> bool:
         """Add an entity to the whitelist. Returns True if newly added."""
         # Skip if already in list or matches existing pattern
-        if entity_id in self.entities or self.is_entity_allowed(entity_id):
+        if entity_id in self._entity_globs or self.is_entity_allowed(entity_id):
             return False
+        # Interned so the long-lived whitelist shares one copy per ID
+        entity_id = sys.intern(entity_id)
         self.entities.append(entity_id)
+        if _is_glob(entity_id):
+            self._entity_globs.add(entity_id)
+            self._entity_glob_prefixes, self._entity_glob_re = _compile_globs(self._entity_globs)
+        else:
+            self._entity_set.add(entity_id)
+        self._entity_allowed.cache_clear()
+        self._version += 1
+        self._dirty = True
         return True
 
     def add_device(self, device_id: str) -> bool:
         """Add a device to the whitelist. Returns True if newly added."""
         # Skip if already in list or matches existing pattern
-        if device_id in self.devices or self.is_device_allowed(device_id):
+        if device_id in self._device_globs or self.is_device_allowed(device_id):
             return False
+        # Interned so the long-lived whitelist shares one copy per ID
+        device_id = sys.intern(device_id)
         self.devices.append(device_id)
+        if _is_glob(device_id):
+            self._device_globs.add(device_id)
+            self._device_glob_prefixes, self._device_glob_re = _compile_globs(self._device_globs)
+        else:
+            self._device_set.add(device_id)
+        self._device_allowed.cache_clear()
+        self._version += 1
+        self._dirty = True
         return True
 
     def add_area(self, area_id: str) -> bool:
         """Add an area to the whitelist. Returns True if newly added."""
         # Skip if already in list or matches existing pattern
-        if area_id in self.areas or self.is_area_allowed(area_id):
+        if area_id in self._area_globs or self.is_area_allowed(area_id):
             return False
+        # Interned so the long-lived whitelist shares one copy per ID
+        area_id = sys.intern(area_id)
         self.areas.append(area_id)
+        if _is_glob(area_id):
+            self._area_globs.add(area_id)
+            self._area_glob_prefixes, self._area_glob_re = _compile_globs(self._area_globs)
+        else:
+            self._area_set.add(area_id)
+        self._area_allowed.cache_clear()
+        self._version += 1
+        self._dirty = True
         return True
 
     def is_endpoint_allowed(self, path: str) -> bool:
         """Check if an endpoint path is allowed."""
-        for pattern in self._endpoint_patterns:
-            if pattern.match(path):
-                return True
-        return False
+        return self._endpoint_allowed(path)
 
     def is_entity_allowed(self, entity_id: str) -> bool:
         """Check if an entity ID is allowed (supports wildcards)."""
-        for pattern in self.entities:
-            if fnmatch.fnmatch(entity_id, pattern):
-                return True
-        return False
+        return self._entity_allowed(entity_id)
 
     def is_device_allowed(self, device_id: str) -> bool:
         """Check if a device ID is allowed (supports wildcards)."""
-        for pattern in self.devices:
-            if fnmatch.fnmatch(device_id, pattern):
-                return True
-        return False
+        return self._device_allowed(device_id)
 
     def is_area_allowed(self, area_id: str) -> bool:
         """Check if an area ID is allowed (supports wildcards)."""
-        for pattern in self.areas:
-            if fnmatch.fnmatch(area_id, pattern):
-                return True
-        return False
+        return self._area_allowed(area_id)
+
+    def _match_endpoint(self, path: str) -> bool:
+        """Match an endpoint path against the compiled patterns (uncached)."""
+        if path in self._endpoint_literals or self._match_endpoint_prefix(path):
+            return True
+        if self._endpoint_combined_count != len(self._endpoint_patterns):
+            self._combine_endpoint_patterns()
+        return (
+            self._endpoint_combined is not None and self._endpoint_combined.match(path) is not None
+        )
+
+    def _match_endpoint_prefix(self, path: str) -> bool:
+        """Match a path against the plain "/prefix/*" endpoints."""
+        # The regex form's .* stops at newlines, so keep rejecting those here too
+        return path.startswith(self._endpoint_prefixes) and "\n" not in path
+
+    def _match_entity(self, entity_id: str) -> bool:
+        """Match an entity ID against the whitelist (uncached)."""
+        if entity_id in self._entity_set:
+            return True
+        if entity_id.startswith(self._entity_glob_prefixes):
+            return True
+        glob_re = self._entity_glob_re
+        return glob_re is not None and glob_re.match(entity_id) is not None
+
+    def _match_device(self, device_id: str) -> bool:
+        """Match a device ID against the whitelist (uncached)."""
+        if device_id in self._device_set:
+            return True
+        if device_id.startswith(self._device_glob_prefixes):
+            return True
+        glob_re = self._device_glob_re
+        return glob_re is not None and glob_re.match(device_id) is not None
+
+    def _match_area(self, area_id: str) -> bool:
+        """Match an area ID against the whitelist (uncached)."""
+        if area_id in self._area_set:
+            return True
+        if area_id.startswith(self._area_glob_prefixes):
+            return True
+        glob_re = self._area_glob_re
+        return glob_re is not None and glob_re.match(area_id) is not None
 
     def to_dict(self) -> dict[str, Any]:
-        """Convert config to dictionary."""
+        """Convert config to dictionary (of copies, so editing it leaves the config as is)."""
         return {
-            "endpoints": self.endpoints,
-            "entities": self.entities,
-            "devices": self.devices,
-            "areas": self.areas,
+            "endpoints": list(self.endpoints),
+            "entities": list(self.entities),
+            "devices": list(self.devices),
+            "areas": list(self.areas),
         }
 
 
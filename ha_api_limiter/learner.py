@@ -1,11 +1,16 @@
 """Learn mode module - tracks accessed endpoints and entities."""
 
-import json
+import functools
 import logging
 import re
+import string
+import sys
+import time
+from concurrent.futures import Future
 from typing import Any
 
 import httpx
+import orjson
 
 from .config import WhitelistConfig
 
@@ -17,6 +22,53 @@ ENTITY_PATH_PATTERNS = [
     re.compile(r"^/api/history/period/[^/]+\?.*entity_id=([a-z_]+\.[a-z0-9_]+)"),  # History API
 ]
 
+# Single alternation matching every normalizable endpoint; the matching group
+# name selects the placeholder template from NORMALIZED_ENDPOINTS
+NORMALIZE_PATH_RE = re.compile(
+    r"^(?:"
+    r"(?P<state>/api/states/[a-z_]+\.[a-z0-9_]+$)"
+    r"|(?P<service>/api/services/[a-z_]+/[a-z_]+$)"
+    r"|(?P<camera_proxy>/api/camera_proxy/[a-z_]+\.[a-z0-9_]+$)"
+    r"|(?P<history>/api/history/period/\d{4}-\d{2}-\d{2})"
+    r"|(?P<logbook>/api/logbook/\d{4}-\d{2}-\d{2})"
+    r")"
+)
+NORMALIZED_ENDPOINTS = {
+    "state": "/api/states/{entity_id}",
+    "service": "/api/services/{domain}/{service}",
+    "camera_proxy": "/api/camera_proxy/{entity_id}",
+    "history": "/api/history/period/{timestamp}",
+    "logbook": "/api/logbook/{timestamp}",
+}
+
+# Characters allowed in an entity ID: lowercase letters, digits, underscores and the dot
+ENTITY_ID_CHARS = frozenset(string.ascii_lowercase + string.digits + "_.")
+
+# Minimum number of seconds between periodic saves, so bursts of learning coalesce
+SAVE_MIN_INTERVAL = 1.0
+
+# JSON keys the learner extracts IDs from; bodies without any of them are skipped
+ID_KEYS = (b"entity_id", b"device_id", b"area_id")
+
+
+def _is_entity_id(value: str) -> bool:
+    """Check that value looks like domain.object_id in Home Assistant's character set."""
+    dot = value.find(".")
+    return (
+        0 < dot < len(value) - 1
+        and value.find(".", dot + 1) == -1
+        and ENTITY_ID_CHARS.issuperset(value)
+    )
+
+
+@functools.lru_cache(maxsize=4096)
+def normalize_endpoint(path: str) -> str:
+    """Normalize an endpoint path, memoized since the same paths recur constantly."""
+    match = NORMALIZE_PATH_RE.match(path)
+    if match is None:
+        return path
+    return NORMALIZED_ENDPOINTS[match.lastgroup]
+
 
 class Learner:
     """Tracks API endpoints and entities accessed during learn mode."""
@@ -25,6 +77,10 @@ class Learner:
         self.whitelist = whitelist
         self._request_count = 0
         self._save_interval = 10  # Save every N requests
+        # time.monotonic() of the last periodic save, None before the first one
+        self._last_save: float | None = None
+        # Background save that failures are already logged for
+        self._save_future: Future[None] | None = None
 
     def _normalize_endpoint(self, path: str) -> str:
         """
@@ -34,35 +90,14 @@ class Learner:
             /api/states/sensor.temp -> /api/states/{entity_id}
             /api/services/light/turn_on -> /api/services/{domain}/{service}
         """
-        # Entity state endpoint
-        if re.match(r"^/api/states/[a-z_]+\.[a-z0-9_]+$", path):
-            return "/api/states/{entity_id}"
-
-        # Service call endpoint
-        match = re.match(r"^/api/services/([a-z_]+)/([a-z_]+)$", path)
-        if match:
-            return "/api/services/{domain}/{service}"
-
-        # Camera proxy endpoint
-        if re.match(r"^/api/camera_proxy/[a-z_]+\.[a-z0-9_]+$", path):
-            return "/api/camera_proxy/{entity_id}"
-
-        # History endpoint with timestamp
-        if re.match(r"^/api/history/period/\d{4}-\d{2}-\d{2}", path):
-            return "/api/history/period/{timestamp}"
-
-        # Logbook endpoint with timestamp
-        if re.match(r"^/api/logbook/\d{4}-\d{2}-\d{2}", path):
-            return "/api/logbook/{timestamp}"
-
-        return path
+        return normalize_endpoint(path)
 
     def _extract_entity_from_path(self, path: str) -> str | None:
         """Extract entity ID from URL path if present."""
         for pattern in ENTITY_PATH_PATTERNS:
             match = pattern.match(path)
             if match:
-                return match.group(1)
+                return sys.intern(match.group(1))
         return None
 
     def _extract_ids_from_json(
@@ -72,70 +107,99 @@ class Learner:
         devices: set[str],
         areas: set[str],
     ) -> None:
-        """Recursively extract entity, device, and area IDs from JSON data."""
-        if isinstance(data, dict):
-            # Check for entity_id field
-            if "entity_id" in data:
-                entity_id = data["entity_id"]
-                if isinstance(entity_id, str) and "." in entity_id:
-                    entities.add(entity_id)
-                elif isinstance(entity_id, list):
-                    for eid in entity_id:
-                        if isinstance(eid, str) and "." in eid:
-                            entities.add(eid)
-
-            # Check for device_id field
-            if "device_id" in data:
-                device_id = data["device_id"]
-                if isinstance(device_id, str) and device_id:
-                    devices.add(device_id)
-                elif isinstance(device_id, list):
-                    for did in device_id:
-                        if isinstance(did, str) and did:
-                            devices.add(did)
-
-            # Check for area_id field
-            if "area_id" in data:
-                area_id = data["area_id"]
-                if isinstance(area_id, str) and area_id:
-                    areas.add(area_id)
-                elif isinstance(area_id, list):
-                    for aid in area_id:
-                        if isinstance(aid, str) and aid:
-                            areas.add(aid)
-
-            # Recurse into nested structures
-            for value in data.values():
-                self._extract_ids_from_json(value, entities, devices, areas)
-
-        elif isinstance(data, list):
-            for item in data:
-                self._extract_ids_from_json(item, entities, devices, areas)
+        """Extract entity, device, and area IDs from JSON data.
+
+        Walks nested dicts and lists with an explicit stack rather than recursion.
+        """
+        # (key, output set, validity check) for each ID field; device and area IDs
+        # only need to be non-empty strings
+        id_fields = (
+            ("entity_id", entities, _is_entity_id),
+            ("device_id", devices, bool),
+            ("area_id", areas, bool),
+        )
+        stack = [data]
+        pop = stack.pop
+        push = stack.append
+
+        while stack:
+            node = pop()
+            # JSON decoders only produce exact builtin types, so compare types
+            # directly instead of walking the MRO with isinstance()
+            node_type = type(node)
+            if node_type is dict:
+                for key, ids, is_valid in id_fields:
+                    if key not in node:
+                        continue
+                    value = node[key]
+                    if type(value) is str:
+                        if is_valid(value):
+                            ids.add(value)
+                    elif type(value) is list:
+                        ids.update(v for v in value if type(v) is str and is_valid(v))
+
+                # Descend into nested structures
+                for value in node.values():
+                    value_type = type(value)
+                    if value_type is dict or value_type is list:
+                        push(value)
+
+            elif node_type is list:
+                for item in node:
+                    item_type = type(item)
+                    if item_type is dict or item_type is list:
+                        push(item)
+
+    def _extract_ids_from_state_changed(self, data: Any, entities: set[str]) -> bool:
+        """
+        Extract the entity ID from a state_changed event message.
+
+        Returns False if the message is not a state_changed event, in which case
+        the caller should fall back to the generic JSON walk.
+        """
+        if type(data) is not dict or data.get("type") != "event":
+            return False
+        event = data.get("event")
+        if type(event) is not dict or event.get("event_type") != "state_changed":
+            return False
+        event_data = event.get("data")
+        if type(event_data) is not dict:
+            return False
+
+        entity_id = event_data.get("entity_id")
+        if type(entity_id) is str and _is_entity_id(entity_id):
+            entities.add(entity_id)
+        return True
 
     def learn_from_request(self, path: str, query: str | None = None) -> None:
         """Learn from an incoming request path."""
         # Log full path with query for debugging
         if query:
-            logger.debug(f"Request: {path}?{query}")
+            logger.debug("Request: %s?%s", path, query)
 
         normalized = self._normalize_endpoint(path)
         if self.whitelist.add_endpoint(normalized):
-            logger.info(f"Learned new endpoint: {normalized}")
+            logger.info("Learned new endpoint: %s", normalized)
 
         # Extract entity from path
         entity_id = self._extract_entity_from_path(path)
         if entity_id and self.whitelist.add_entity(entity_id):
-            logger.info(f"Learned new entity from path: {entity_id}")
+            logger.info("Learned new entity from path: %s", entity_id)
 
     def learn_from_response(self, response: httpx.Response) -> None:
         """Learn entity, device, and area IDs from response body."""
         content_type = response.headers.get("content-type", "")
-        if "application/json" not in content_type:
+        if not content_type.startswith("application/json"):
+            return
+
+        # Cheap substring scan before paying for a full parse and walk
+        body = response.content
+        if not any(key in body for key in ID_KEYS):
             return
 
         try:
-            data = response.json()
-        except json.JSONDecodeError:
+            data = orjson.loads(body)
+        except orjson.JSONDecodeError:
             return
 
         entities: set[str] = set()
@@ -145,53 +209,88 @@ class Learner:
 
         for entity_id in entities:
             if self.whitelist.add_entity(entity_id):
-                logger.info(f"Learned new entity from response: {entity_id}")
+                logger.info("Learned new entity from response: %s", entity_id)
 
         for device_id in devices:
             if self.whitelist.add_device(device_id):
-                logger.info(f"Learned new device from response: {device_id}")
+                logger.info("Learned new device from response: %s", device_id)
 
         for area_id in areas:
             if self.whitelist.add_area(area_id):
-                logger.info(f"Learned new area from response: {area_id}")
+                logger.info("Learned new area from response: %s", area_id)
 
-    def learn_from_websocket_message(self, message: str) -> None:
-        """Learn entity, device, and area IDs from a WebSocket message."""
-        try:
-            data = json.loads(message)
-        except json.JSONDecodeError:
-            return
+    def learn_from_websocket_message(self, message: str | bytes | dict | list) -> None:
+        """Learn entity, device, and area IDs from a WebSocket message.
+
+        Accepts either the raw frame or an already-parsed message, so callers that
+        decoded the frame for their own dispatch don't pay for a second parse.
+        """
+        if type(message) is dict or type(message) is list:
+            data = message
+        else:
+            try:
+                data = orjson.loads(message)
+            except orjson.JSONDecodeError:
+                return
 
         entities: set[str] = set()
         devices: set[str] = set()
         areas: set[str] = set()
-        self._extract_ids_from_json(data, entities, devices, areas)
+        # state_changed events dominate WebSocket traffic and have a fixed shape,
+        # so read their entity ID directly instead of walking both state objects
+        if not self._extract_ids_from_state_changed(data, entities):
+            self._extract_ids_from_json(data, entities, devices, areas)
 
         for entity_id in entities:
             if self.whitelist.add_entity(entity_id):
-                logger.info(f"Learned new entity from WebSocket: {entity_id}")
+                logger.info("Learned new entity from WebSocket: %s", entity_id)
 
         for device_id in devices:
             if self.whitelist.add_device(device_id):
-                logger.info(f"Learned new device from WebSocket: {device_id}")
+                logger.info("Learned new device from WebSocket: %s", device_id)
 
         for area_id in areas:
             if self.whitelist.add_area(area_id):
-                logger.info(f"Learned new area from WebSocket: {area_id}")
+                logger.info("Learned new area from WebSocket: %s", area_id)
 
     def maybe_save(self) -> None:
         """Save whitelist periodically based on request count."""
         self._request_count += 1
-        if self._request_count >= self._save_interval:
-            self.save()
-            self._request_count = 0
+        if self._request_count < self._save_interval:
+            return
+        self._request_count = 0
+
+        # Skip saves with nothing new to write, or too soon after the last one;
+        # anything learned meanwhile keeps the whitelist dirty for a later save
+        if not self.whitelist.dirty:
+            return
+        now = time.monotonic()
+        if self._last_save is not None and now - self._last_save < SAVE_MIN_INTERVAL:
+            return
+        self._last_save = now
+
+        # Write on the whitelist's save thread so the YAML dump doesn't block
+        # the event loop; a save still in progress absorbs this one, and already
+        # has its error logging attached
+        future = self.whitelist.save_in_background()
+        if future is not self._save_future:
+            self._save_future = future
+            future.add_done_callback(self._log_save_error)
+
+    @staticmethod
+    def _log_save_error(future: Future[None]) -> None:
+        """Log a failed background save."""
+        error = future.exception()
+        if error is not None:
+            logger.error("Failed to save whitelist: %s", error)
 
     def save(self) -> None:
         """Force save the whitelist to disk."""
         logger.info(
-            f"Saving whitelist: {len(self.whitelist.endpoints)} endpoints, "
-            f"{len(self.whitelist.entities)} entities, "
-            f"{len(self.whitelist.devices)} devices, "
-            f"{len(self.whitelist.areas)} areas"
+            "Saving whitelist: %d endpoints, %d entities, %d devices, %d areas",
+            len(self.whitelist.endpoints),
+            len(self.whitelist.entities),
+            len(self.whitelist.devices),
+            len(self.whitelist.areas),
         )
         self.whitelist.save()
@@ -1,16 +1,41 @@
 """Limit mode module - enforces whitelist restrictions."""
 
+import functools
 import logging
-import re
+import string
+from collections.abc import Iterator
 from dataclasses import dataclass
-from urllib.parse import parse_qs
+from urllib.parse import unquote_plus
 
 from .config import WhitelistConfig
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of (path, query) decisions remembered by a Limiter
+CHECK_CACHE_SIZE = 4096
 
-@dataclass
+# Path prefixes that carry entity IDs, in the path or in the query string
+STATE_PATH_PREFIX = "/api/states/"
+CAMERA_PROXY_PATH_PREFIX = "/api/camera_proxy/"
+HISTORY_PATH_PREFIX = "/api/history/period/"
+LOGBOOK_PATH_PREFIX = "/api/logbook/"
+
+# Characters allowed in the domain and object ID parts of an entity ID
+DOMAIN_CHARS = frozenset(string.ascii_lowercase + "_")
+OBJECT_ID_CHARS = frozenset(string.ascii_lowercase + string.digits + "_")
+
+
+def _parse_entity(value: str) -> str | None:
+    """Return value if it is a valid entity ID (domain.object_id), else None."""
+    domain, dot, object_id = value.partition(".")
+    if not dot or not domain or not object_id:
+        return None
+    if not DOMAIN_CHARS.issuperset(domain) or not OBJECT_ID_CHARS.issuperset(object_id):
+        return None
+    return value
+
+
+@dataclass(frozen=True)
 class CheckResult:
     """Result of a whitelist check."""
 
@@ -18,45 +43,60 @@ class CheckResult:
     reason: str
 
 
+# Shared result for allowed requests, which doesn't vary per request
+ALLOWED = CheckResult(allowed=True, reason="Allowed by whitelist")
+
+
+def _iter_query_values(query: str, key: str) -> Iterator[str]:
+    """Yield the non-empty values of key in a query string, like parse_qs(query)[key]."""
+    for pair in query.split("&"):
+        name, sep, value = pair.partition("=")
+        if not sep or not value:
+            continue
+        # Entity IDs are plain ASCII, so only decode when there is something to decode
+        if "%" in name or "+" in name:
+            name = unquote_plus(name)
+        if name != key:
+            continue
+        if "%" in value or "+" in value:
+            value = unquote_plus(value)
+        yield value
+
+
 class Limiter:
     """Enforces whitelist restrictions on incoming requests."""
 
     def __init__(self, whitelist: WhitelistConfig):
         self.whitelist = whitelist
+        # Memoized decisions, keyed on the whitelist version so changes bypass stale entries
+        self._cached_check = functools.lru_cache(maxsize=CHECK_CACHE_SIZE)(self._check)
 
     def _extract_entity_from_path(self, path: str) -> str | None:
         """Extract entity ID from state-related endpoints."""
         # /api/states/{entity_id}
-        match = re.match(r"^/api/states/([a-z_]+\.[a-z0-9_]+)$", path)
-        if match:
-            return match.group(1)
+        if path.startswith(STATE_PATH_PREFIX):
+            return _parse_entity(path.removeprefix(STATE_PATH_PREFIX))
 
         # /api/camera_proxy/{entity_id}
-        match = re.match(r"^/api/camera_proxy/([a-z_]+\.[a-z0-9_]+)$", path)
-        if match:
-            return match.group(1)
+        if path.startswith(CAMERA_PROXY_PATH_PREFIX):
+            return _parse_entity(path.removeprefix(CAMERA_PROXY_PATH_PREFIX))
 
         return None
 
-    def _extract_entities_from_query(self, path: str, query: str) -> list[str]:
-        """Extract entity IDs from query parameters for specific endpoints."""
-        entities = []
-
+    def _extract_entities_from_query(self, path: str, query: str) -> Iterator[str]:
+        """Extract entity IDs from query parameters for specific endpoints, lazily."""
         # /api/history/period/* - check filter_entity_id param
-        if path.startswith("/api/history/period/"):
-            params = parse_qs(query)
-            filter_entities = params.get("filter_entity_id", [])
-            for entity_list in filter_entities:
+        if path.startswith(HISTORY_PATH_PREFIX):
+            for entity_list in _iter_query_values(query, "filter_entity_id"):
                 # Can be comma-separated
-                entities.extend(e.strip() for e in entity_list.split(",") if e.strip())
+                for entity_id in entity_list.split(","):
+                    entity_id = entity_id.strip()
+                    if entity_id:
+                        yield entity_id
 
         # /api/logbook/* - check entity param
-        elif path.startswith("/api/logbook/"):
-            params = parse_qs(query)
-            entity_params = params.get("entity", [])
-            entities.extend(entity_params)
-
-        return entities
+        elif path.startswith(LOGBOOK_PATH_PREFIX):
+            yield from _iter_query_values(query, "entity")
 
     def check_request(self, path: str, method: str = "GET", query: str = "") -> CheckResult:
         """
@@ -70,13 +110,20 @@ class Limiter:
         Returns:
             CheckResult indicating if allowed and why
         """
-        # Always allow health check
-        if path == "/health":
-            return CheckResult(allowed=True, reason="Health check endpoint")
+        result = self._cached_check(path, query, self.whitelist.version)
+        if not result.allowed:
+            logger.warning("Blocked request: %s", result.reason)
+        return result
+
+    def _check(self, path: str, query: str, version: int) -> CheckResult:
+        """Check a request against the whitelist (version only keys the cache)."""
+        # A decoded %0A could end an entity ID that the parsers below then reject, which
+        # would skip the entity check while [^/]+ endpoint patterns still match
+        if "\n" in path:
+            return CheckResult(allowed=False, reason="Path contains a newline")
 
         # Check if endpoint pattern is allowed
         if not self.whitelist.is_endpoint_allowed(path):
-            logger.warning(f"Blocked endpoint: {path}")
             return CheckResult(
                 allowed=False,
                 reason=f"Endpoint not in whitelist: {path}",
@@ -86,20 +133,25 @@ class Limiter:
         entity_id = self._extract_entity_from_path(path)
         if entity_id:
             if not self.whitelist.is_entity_allowed(entity_id):
-                logger.warning(f"Blocked entity: {entity_id}")
                 return CheckResult(
                     allowed=False,
                     reason=f"Entity not in whitelist: {entity_id}",
                 )
 
-        # For endpoints with entity filtering in query params
-        query_entities = self._extract_entities_from_query(path, query)
-        for entity_id in query_entities:
-            if not self.whitelist.is_entity_allowed(entity_id):
-                logger.warning(f"Blocked entity in query: {entity_id}")
-                return CheckResult(
-                    allowed=False,
-                    reason=f"Entity not in whitelist: {entity_id}",
-                )
+        # For endpoints with entity filtering in query params; stops at the first blocked one
+        is_entity_allowed = self.whitelist.is_entity_allowed
+        blocked = next(
+            (
+                entity_id
+                for entity_id in self._extract_entities_from_query(path, query)
+                if not is_entity_allowed(entity_id)
+            ),
+            None,
+        )
+        if blocked is not None:
+            return CheckResult(
+                allowed=False,
+                reason=f"Entity not in whitelist: {blocked}",
+            )
 
-        return CheckResult(allowed=True, reason="Allowed by whitelist")
+        return ALLOWED
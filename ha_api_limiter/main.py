@@ -5,9 +5,12 @@ import logging
 from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import AsyncGenerator
+from urllib.parse import unquote
 
+import orjson
 import uvicorn
 from fastapi import FastAPI, Request, Response, WebSocket
+from fastapi.responses import ORJSONResponse
 
 from .config import Mode, Settings, WhitelistConfig, settings
 from .learner import Learner
@@ -22,23 +25,30 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Pre-encoded body for the fixed proxy error
+PROXY_NOT_INITIALIZED_BODY = orjson.dumps({"error": "Proxy not initialized"})
+
 # Global instances
 proxy: HAProxy | None = None
 whitelist: WhitelistConfig | None = None
 learner: Learner | None = None
 limiter: Limiter | None = None
-ws_filter: WebSocketFilter | None = None
+
+
+def _has_dot_segments(path: str) -> bool:
+    """Check for "." or ".." path segments, which the upstream URL handling collapses."""
+    return "." in path and any(unquote(segment) in (".", "..") for segment in path.split("/"))
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Application lifespan handler for startup and shutdown."""
-    global proxy, whitelist, learner, limiter, ws_filter
+    global proxy, whitelist, learner, limiter
 
     # Initialize proxy
     proxy = HAProxy(settings.ha_url)
     await proxy.startup()
-    logger.info(f"Proxy initialized, forwarding to: {settings.ha_url}")
+    logger.info("Proxy initialized, forwarding to: %s", settings.ha_url)
 
     # Initialize whitelist config
     whitelist = WhitelistConfig(settings.config_path)
@@ -48,22 +58,23 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         # Always load existing whitelist to extend it
         whitelist.load()
         logger.info(
-            f"Loaded existing whitelist: {len(whitelist.endpoints)} endpoints, "
-            f"{len(whitelist.entities)} entities, "
-            f"{len(whitelist.devices)} devices, "
-            f"{len(whitelist.areas)} areas"
+            "Loaded existing whitelist: %d endpoints, %d entities, %d devices, %d areas",
+            len(whitelist.endpoints),
+            len(whitelist.entities),
+            len(whitelist.devices),
+            len(whitelist.areas),
         )
         learner = Learner(whitelist)
     else:
         logger.info("Starting in LIMIT mode - enforcing whitelist restrictions")
         whitelist.load()
         limiter = Limiter(whitelist)
-        ws_filter = WebSocketFilter(whitelist)
         logger.info(
-            f"Loaded whitelist: {len(whitelist.endpoints)} endpoints, "
-            f"{len(whitelist.entities)} entities, "
-            f"{len(whitelist.devices)} devices, "
-            f"{len(whitelist.areas)} areas"
+            "Loaded whitelist: %d endpoints, %d entities, %d devices, %d areas",
+            len(whitelist.endpoints),
+            len(whitelist.entities),
+            len(whitelist.devices),
+            len(whitelist.areas),
         )
 
     yield
@@ -82,6 +93,7 @@ app = FastAPI(
     description="MITM proxy for Home Assistant that limits accessible endpoints and sensors",
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 
@@ -106,6 +118,10 @@ async def websocket_proxy(websocket: WebSocket) -> None:
     if learner:
         learner.learn_from_request("/api/websocket", "")
 
+    # In limit mode, filter with per-connection state, since request and
+    # subscription IDs are only unique within one connection
+    ws_filter = WebSocketFilter(whitelist) if limiter and whitelist else None
+
     await proxy.forward_websocket(
         websocket, "/api/websocket", ws_filter=ws_filter, ws_learner=learner
     )
@@ -115,29 +131,33 @@ async def websocket_proxy(websocket: WebSocket) -> None:
 async def proxy_request(request: Request, path: str) -> Response:
     """Catch-all route that proxies requests to Home Assistant."""
     full_path = f"/{path}"
+    query = request.url.query
 
-    # In limit mode, check whitelist first
+    # In limit mode, check whitelist first (static frontend assets skip the check)
     if limiter:
-        result = limiter.check_request(full_path, request.method, request.url.query or "")
-        if not result.allowed:
-            return Response(
-                content=f'{{"error": "{result.reason}"}}',
-                status_code=403,
-                media_type="application/json",
-            )
+        # Dot segments would let a path checked as one prefix reach another upstream
+        if _has_dot_segments(full_path):
+            return ORJSONResponse({"error": "Path contains dot segments"}, status_code=403)
+        if not full_path.startswith(settings.always_allow_prefixes):
+            result = limiter.check_request(full_path, request.method, query)
+            if not result.allowed:
+                return ORJSONResponse({"error": result.reason}, status_code=403)
 
     # Forward request to Home Assistant
     if proxy is None:
         return Response(
-            content='{"error": "Proxy not initialized"}',
+            content=PROXY_NOT_INITIALIZED_BODY,
             status_code=503,
             media_type="application/json",
         )
-    response, upstream_response = await proxy.forward_request(request)
+    # Learn mode inspects the response body, so only then is it buffered
+    response, upstream_response = await proxy.forward_request(
+        request, full_path, query, buffer=learner is not None
+    )
 
     # In learn mode, track the request and response
     if learner:
-        learner.learn_from_request(full_path, request.url.query)
+        learner.learn_from_request(full_path, query)
         learner.learn_from_response(upstream_response)
         learner.maybe_save()
 
@@ -209,10 +229,10 @@ def main() -> None:
     # Import settings again to get updated values
     from .config import settings
 
-    logger.info(f"Starting HA API Limiter on {settings.host}:{settings.port}")
-    logger.info(f"Mode: {settings.mode.value}")
-    logger.info(f"Home Assistant URL: {settings.ha_url}")
-    logger.info(f"Config path: {settings.config_path}")
+    logger.info("Starting HA API Limiter on %s:%s", settings.host, settings.port)
+    logger.info("Mode: %s", settings.mode.value)
+    logger.info("Home Assistant URL: %s", settings.ha_url)
+    logger.info("Config path: %s", settings.config_path)
 
     uvicorn.run(
         app,
@@ -3,13 +3,16 @@
 from __future__ import annotations
 
 import asyncio
+import ipaddress
 import logging
+from collections.abc import AsyncIterator, Iterable
 from typing import TYPE_CHECKING
 from urllib.parse import urlparse
 
 import httpx
 import websockets
 from fastapi import Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 
 from .config import settings
 
@@ -35,6 +38,31 @@ HOP_BY_HOP_HEADERS = {
     "content-encoding",
 }
 
+# Same names as raw bytes, for matching ASGI header pairs (names already lowercase)
+HOP_BY_HOP_HEADERS_RAW = frozenset(name.encode("latin-1") for name in HOP_BY_HOP_HEADERS)
+
+
+async def _stream_body(upstream_response: httpx.Response) -> AsyncIterator[bytes]:
+    """Yield the upstream body, releasing the connection however streaming ends."""
+    try:
+        async for chunk in upstream_response.aiter_bytes():
+            yield chunk
+    finally:
+        await upstream_response.aclose()
+
+
+def _is_local_host(hostname: str | None) -> bool:
+    """Check if a hostname refers to this machine or the local network."""
+    if not hostname:
+        return False
+    if hostname == "localhost" or hostname.endswith(".local"):
+        return True
+    try:
+        address = ipaddress.ip_address(hostname)
+    except ValueError:
+        return False
+    return address.is_loopback or address.is_private
+
 
 class HAProxy:
     """Async HTTP proxy for Home Assistant API requests."""
@@ -42,12 +70,22 @@ class HAProxy:
     def __init__(self, ha_url: str | None = None):
         self.ha_url = (ha_url or settings.ha_url).rstrip("/")
         self._client: httpx.AsyncClient | None = None
+        # Derived from ha_url once, since it doesn't change per connection
+        parsed = urlparse(self.ha_url)
+        ws_scheme = "wss" if parsed.scheme == "https" else "ws"
+        self._ws_base = f"{ws_scheme}://{parsed.netloc}"
+        # Deflating frames only costs CPU on both ends when HA is on the local network
+        self._ws_compression = None if _is_local_host(parsed.hostname) else "deflate"
 
     async def startup(self) -> None:
         """Initialize the HTTP client."""
         self._client = httpx.AsyncClient(
             base_url=self.ha_url,
             timeout=httpx.Timeout(30.0, connect=10.0),
+            # Keep enough idle connections around for bursts of dashboard requests
+            limits=httpx.Limits(
+                max_connections=200, max_keepalive_connections=100, keepalive_expiry=60.0
+            ),
             follow_redirects=True,
         )
 
@@ -64,56 +102,91 @@ class HAProxy:
             raise RuntimeError("Proxy not initialized. Call startup() first.")
         return self._client
 
-    def _filter_headers(self, headers: dict[str, str]) -> dict[str, str]:
-        """Filter out hop-by-hop headers."""
-        return {
-            key: value for key, value in headers.items() if key.lower() not in HOP_BY_HOP_HEADERS
-        }
-
-    async def forward_request(self, request: Request) -> tuple[Response, httpx.Response]:
+    def _filter_headers(self, headers: Iterable[tuple[bytes, bytes]]) -> list[tuple[bytes, bytes]]:
+        """Filter out hop-by-hop headers from raw ASGI header pairs."""
+        return [(key, value) for key, value in headers if key not in HOP_BY_HOP_HEADERS_RAW]
+
+    def _filter_response_headers(self, headers: httpx.Headers) -> list[tuple[bytes, bytes]]:
+        """Filter out hop-by-hop headers from an upstream response, as lowercase raw pairs."""
+        filtered = []
+        for key, value in headers.raw:
+            key = key.lower()
+            if key not in HOP_BY_HOP_HEADERS_RAW:
+                filtered.append((key, value))
+        return filtered
+
+    async def forward_request(
+        self, request: Request, path: str, query: str = "", buffer: bool = False
+    ) -> tuple[Response, httpx.Response]:
         """
         Forward a request to Home Assistant and return the response.
 
+        The upstream body is streamed through to the client unless buffer is set,
+        in which case it is read fully so the caller can inspect it (learn mode).
+
+        Args:
+            request: The incoming request
+            path: The request path, as already parsed by the caller
+            query: The raw query string, as already parsed by the caller
+            buffer: Whether to read the whole upstream body before returning
+
         Returns:
             Tuple of (FastAPI Response, raw httpx Response for inspection)
         """
         # Build the target URL
-        target_path = request.url.path
-        if request.url.query:
-            target_path = f"{target_path}?{request.url.query}"
-
-        # Get request body
-        body = await request.body()
+        target_path = f"{path}?{query}" if query else path
+
+        # Get request body, skipping the receive round trip when none was announced
+        request_headers = request.headers
+        content_length = request_headers.get("content-length")
+        if (content_length is None or content_length == "0") and (
+            "transfer-encoding" not in request_headers
+        ):
+            body = None
+        else:
+            body = await request.body()
 
         # Filter headers for forwarding
-        headers = self._filter_headers(dict(request.headers))
+        headers = self._filter_headers(request_headers.raw)
 
-        # Make the proxied request
-        upstream_response = await self.client.request(
+        # Make the proxied request, leaving the body unread for now
+        upstream_request = self.client.build_request(
             method=request.method,
             url=target_path,
             headers=headers,
             content=body,
         )
+        upstream_response = await self.client.send(upstream_request, stream=True)
+
+        # Build response headers (filter hop-by-hop), keeping repeated ones like set-cookie
+        response_headers = self._filter_response_headers(upstream_response.headers)
 
-        # Build response headers (filter hop-by-hop)
-        response_headers = self._filter_headers(dict(upstream_response.headers))
+        if not buffer:
+            # Decoded bytes, since content-encoding is not forwarded
+            response: Response = StreamingResponse(
+                _stream_body(upstream_response),
+                status_code=upstream_response.status_code,
+            )
+            response.raw_headers.extend(response_headers)
+            return response, upstream_response
+
+        try:
+            await upstream_response.aread()
+        finally:
+            await upstream_response.aclose()
 
-        # Create FastAPI response
+        # Create FastAPI response (content-type comes with the upstream headers)
         response = Response(
             content=upstream_response.content,
             status_code=upstream_response.status_code,
-            headers=response_headers,
-            media_type=upstream_response.headers.get("content-type"),
         )
+        response.raw_headers.extend(response_headers)
 
         return response, upstream_response
 
     def _get_ws_url(self, path: str) -> str:
         """Convert HTTP URL to WebSocket URL."""
-        parsed = urlparse(self.ha_url)
-        ws_scheme = "wss" if parsed.scheme == "https" else "ws"
-        return f"{ws_scheme}://{parsed.netloc}{path}"
+        return self._ws_base + path
 
     async def forward_websocket(
         self,
@@ -134,11 +207,13 @@ class HAProxy:
         await websocket.accept()
 
         ws_url = self._get_ws_url(path)
-        logger.info(f"Connecting to upstream WebSocket: {ws_url}")
+        logger.info("Connecting to upstream WebSocket: %s", ws_url)
 
         try:
-            async with websockets.connect(ws_url, max_size=10 * 1024 * 1024) as upstream_ws:
-                logger.info(f"WebSocket connected to {ws_url}")
+            async with websockets.connect(
+                ws_url, max_size=10 * 1024 * 1024, compression=self._ws_compression
+            ) as upstream_ws:
+                logger.info("WebSocket connected to %s", ws_url)
 
                 async def client_to_upstream():
                     """Forward messages from client to upstream."""
@@ -180,33 +255,36 @@ class HAProxy:
                     except WebSocketDisconnect:
                         logger.info("Client WebSocket disconnected")
                     except Exception as e:
-                        logger.debug(f"Client to upstream error: {e}")
+                        logger.debug("Client to upstream error: %s", e)
 
                 async def upstream_to_client():
                     """Forward messages from upstream to client."""
+                    # Resolve the per-mode hooks once rather than on every frame
+                    send_text = websocket.send_text
+                    learn = ws_learner.learn_from_websocket_message if ws_learner else None
+                    filter_message = ws_filter.filter_server_message if ws_filter else None
                     try:
                         async for message in upstream_ws:
-                            if isinstance(message, str):
+                            if type(message) is str:
                                 # Learn from server messages in learn mode
-                                if ws_learner:
-                                    ws_learner.learn_from_websocket_message(message)
+                                if learn is not None:
+                                    learn(message)
 
                                 # Apply filter if present
-                                if ws_filter:
-                                    filtered = ws_filter.filter_server_message(message)
-                                    if filtered is None:
+                                if filter_message is not None:
+                                    message = filter_message(message)
+                                    if message is None:
                                         continue
-                                    message = filtered
 
-                                await websocket.send_text(message)
+                                await send_text(message)
                             else:
                                 # Binary messages - block in limit mode (can't inspect content)
-                                if ws_filter:
+                                if filter_message is not None:
                                     logger.warning("Blocked binary WebSocket message from upstream")
                                     continue
                                 await websocket.send_bytes(message)
                     except Exception as e:
-                        logger.debug(f"Upstream to client error: {e}")
+                        logger.debug("Upstream to client error: %s", e)
 
                 # Run both directions concurrently
                 await asyncio.gather(
@@ -216,12 +294,8 @@ class HAProxy:
                 )
 
         except Exception as e:
-            logger.error(f"WebSocket proxy error: {e}")
+            logger.error("WebSocket proxy error: %s", e)
             try:
                 await websocket.close(code=1011, reason=str(e))
             except Exception:
                 pass
-
-
-# Global proxy instance
-proxy = HAProxy()
@@ -1,17 +1,70 @@
 """WebSocket message filtering for Home Assistant API."""
 
-import json
+import functools
 import logging
 import re
+from collections.abc import Callable
 from typing import Any
 
+import orjson
+
 from .config import WhitelistConfig
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of memoized message type and service decisions per filter
+DECISION_CACHE_SIZE = 512
+
+# Finds a message's "type" value in raw JSON, for recognising control frames unparsed
+MESSAGE_TYPE_RE = re.compile(r'"type"\s*:\s*"([^"]*)"')
+
+# Only frames up to this size are probed for their type before parsing
+MESSAGE_TYPE_PROBE_LIMIT = 512
+
+# Maximum number of tracked requests and entity subscriptions per filter (one filter per
+# connection). Untracked responses would pass unfiltered, so new ones are refused rather
+# than evicting old ones
+MAX_TRACKED_REQUESTS = 1024
+MAX_ENTITY_SUBSCRIPTIONS = 1024
+
+# Serialized not_allowed error result; %s slots take the JSON-encoded ID and message
+ERROR_RESPONSE_TEMPLATE = (
+    '{"id":%s,"type":"result","success":false,"error":{"code":"not_allowed","message":%s}}'
+)
+
+
+def _group_services_by_domain(
+    services: set[tuple[str, str]],
+) -> dict[str, frozenset[str] | None]:
+    """Group (domain, service) pairs by domain, mapping wildcard domains to None."""
+    grouped: dict[str, set[str] | None] = {}
+    for domain, service in services:
+        if service == "*":
+            grouped[domain] = None
+        elif domain not in grouped:
+            grouped[domain] = {service}
+        elif grouped[domain] is not None:
+            grouped[domain].add(service)
+    return {
+        domain: None if names is None else frozenset(names) for domain, names in grouped.items()
+    }
+
 
 class WebSocketFilter:
-    """Filters WebSocket messages based on entity whitelist."""
+    """Filters WebSocket messages based on entity whitelist.
+
+    Tracks request and subscription IDs, which are scoped to a single connection, so
+    create one filter per WebSocket connection.
+    """
+
+    __slots__ = (
+        "whitelist",
+        "_pending_requests",
+        "_entity_subscriptions",
+        "_service_blocked",
+        "_message_type_blocked",
+        "_client_handlers",
+    )
 
     # Message types that return entity lists that need filtering
     ENTITY_LIST_TYPES = {
@@ -35,6 +88,19 @@ class WebSocketFilter:
         "config/floor_registry/list",
     }
 
+    # All request types whose responses are filtered
+    TRACKED_REQUEST_TYPES = (
+        ENTITY_LIST_TYPES | DEVICE_LIST_TYPES | AREA_LIST_TYPES | FLOOR_LIST_TYPES
+    )
+
+    # ID field, whitelist check and noun used to filter each entity/device/area list
+    # (get_states and the entity registry use entity_id, the device registry uses id)
+    LIST_FILTERS = {
+        **dict.fromkeys(ENTITY_LIST_TYPES, ("entity_id", "is_entity_allowed", "entities")),
+        **dict.fromkeys(DEVICE_LIST_TYPES, ("id", "is_device_allowed", "devices")),
+        **dict.fromkeys(AREA_LIST_TYPES, ("area_id", "is_area_allowed", "areas")),
+    }
+
     # Subscription types that send entity data in events
     ENTITY_SUBSCRIPTION_TYPES = {
         "subscribe_entities",
@@ -49,18 +115,28 @@ class WebSocketFilter:
         "intent/handle",  # Voice command handling - can control entities
     }
 
-    # Message type patterns that are blocked (for config access)
-    BLOCKED_MESSAGE_PATTERNS = [
-        re.compile(r"^config/automation/"),  # Automation config access
-        re.compile(r"^config/script/"),  # Script config access
-        re.compile(r"^config/scene/"),  # Scene config access
-        re.compile(r"^config_entries/"),  # Config entries
-        re.compile(r"^hassio/"),  # Supervisor access
-        re.compile(r"^backup/"),  # Backup access
-        re.compile(r"^auth/sign_path$"),  # URL signing (security risk)
-        re.compile(r"^auth/refresh_token"),  # Token management
-        re.compile(r"^auth/delete_refresh_token"),
-    ]
+    # Message type prefixes that are blocked (for config access)
+    BLOCKED_MESSAGE_PREFIXES = (
+        "config/automation/",  # Automation config access
+        "config/script/",  # Script config access
+        "config/scene/",  # Scene config access
+        "config_entries/",  # Config entries
+        "hassio/",  # Supervisor access
+        "backup/",  # Backup access
+        "auth/refresh_token",  # Token management
+        "auth/delete_refresh_token",
+    )
+
+    # Message types blocked by exact name (alongside BLOCKED_MESSAGE_TYPES)
+    BLOCKED_MESSAGE_LITERALS = {
+        "auth/sign_path",  # URL signing (security risk)
+    }
+
+    # Control message types that never need inspection (forwarded without parsing)
+    PASSTHROUGH_MESSAGE_TYPES = {
+        "auth",
+        "ping",
+    }
 
     # Message types that are explicitly allowed (override blocked patterns)
     ALLOWED_MESSAGE_TYPES = {
@@ -115,6 +191,9 @@ class WebSocketFilter:
     }
     # Note: system_log.write is NOT blocked - it's used by frontend for error reporting
 
+    # BLOCKED_SERVICES grouped by domain; None blocks every service in the domain
+    BLOCKED_SERVICES_BY_DOMAIN = _group_services_by_domain(BLOCKED_SERVICES)
+
     # Services that require entity validation (domain -> requires entity check)
     ENTITY_CONTROLLED_DOMAINS = {
         "light",
@@ -164,6 +243,20 @@ class WebSocketFilter:
         self._pending_requests: dict[int, str] = {}
         # Track subscription IDs that need event filtering
         self._entity_subscriptions: set[int] = set()
+        # Memoized block decisions, keyed on the whitelist version so overrides apply
+        self._service_blocked = functools.lru_cache(maxsize=DECISION_CACHE_SIZE)(
+            self._check_service_blocked
+        )
+        self._message_type_blocked = functools.lru_cache(maxsize=DECISION_CACHE_SIZE)(
+            self._check_message_type_blocked
+        )
+        # Per-type checks run on client messages that pass the message type gate
+        self._client_handlers: dict[str, Callable[..., tuple[bool, str | None]]] = {
+            "subscribe_events": self._handle_subscribe_events,
+            "call_service": self._handle_call_service,
+            **dict.fromkeys(self.TRACKED_REQUEST_TYPES, self._track_request),
+            **dict.fromkeys(self.ENTITY_SUBSCRIPTION_TYPES, self._track_entity_subscription),
+        }
 
     def _extract_ids_from_target(
         self, data: dict[str, Any]
@@ -179,55 +272,50 @@ class WebSocketFilter:
         entities: list[str] = []
         devices: list[str] = []
         areas: list[str] = []
+        # Messages come straight from orjson, so exact type checks are sufficient
+        id_fields = (("entity_id", entities), ("device_id", devices), ("area_id", areas))
 
         # Check both service_data and target for IDs
-        for field in ["service_data", "target"]:
-            container = data.get(field, {})
-            if not isinstance(container, dict):
+        for container in (data.get("service_data"), data.get("target")):
+            if type(container) is not dict:
                 continue
-
-            # Extract entity_id
-            entity_id = container.get("entity_id")
-            if isinstance(entity_id, str):
-                entities.append(entity_id)
-            elif isinstance(entity_id, list):
-                entities.extend(e for e in entity_id if isinstance(e, str))
-
-            # Extract device_id
-            device_id = container.get("device_id")
-            if isinstance(device_id, str):
-                devices.append(device_id)
-            elif isinstance(device_id, list):
-                devices.extend(d for d in device_id if isinstance(d, str))
-
-            # Extract area_id
-            area_id = container.get("area_id")
-            if isinstance(area_id, str):
-                areas.append(area_id)
-            elif isinstance(area_id, list):
-                areas.extend(a for a in area_id if isinstance(a, str))
+            for key, ids in id_fields:
+                value = container.get(key)
+                if type(value) is str:
+                    ids.append(value)
+                elif type(value) is list:
+                    ids.extend(v for v in value if type(v) is str)
 
         return entities, devices, areas
 
     def _is_service_blocked(self, domain: str, service: str) -> bool:
         """Check if a service is in the blocked list."""
-        # Check config override first (user-allowed services)
-        service_str = f"{domain}.{service}"
-        if service_str in self.whitelist.allowed_services:
+        return self._service_blocked(domain, service, self.whitelist.version)
+
+    def _check_service_blocked(self, domain: str, service: str, version: int) -> bool:
+        """Check if a service is blocked (uncached; version only keys the cache)."""
+        # Most domains are not blocked at all, so settle those with one lookup
+        if domain not in self.BLOCKED_SERVICES_BY_DOMAIN:
+            return False
+        blocked = self.BLOCKED_SERVICES_BY_DOMAIN[domain]
+        # None means every service in the domain is blocked (domain.*)
+        if blocked is not None and service not in blocked:
+            return False
+        # Check config override (user-allowed services)
+        allowed_services = self.whitelist.allowed_services
+        if f"{domain}.{service}" in allowed_services:
             return False
         # Check wildcard override (e.g., "automation.*")
-        if f"{domain}.*" in self.whitelist.allowed_services:
+        if f"{domain}.*" in allowed_services:
             return False
-        # Check exact match in block list
-        if (domain, service) in self.BLOCKED_SERVICES:
-            return True
-        # Check wildcard match (domain, "*")
-        if (domain, "*") in self.BLOCKED_SERVICES:
-            return True
-        return False
+        return True
 
     def _is_message_type_blocked(self, msg_type: str) -> bool:
         """Check if a message type is blocked."""
+        return self._message_type_blocked(msg_type, self.whitelist.version)
+
+    def _check_message_type_blocked(self, msg_type: str, version: int) -> bool:
+        """Check if a message type is blocked (uncached; version only keys the cache)."""
         # Check config override first (user-allowed types)
         if msg_type in self.whitelist.allowed_ws_types:
             return False
@@ -237,11 +325,10 @@ class WebSocketFilter:
         # Check explicit block list
         if msg_type in self.BLOCKED_MESSAGE_TYPES:
             return True
-        # Check pattern blocks
-        for pattern in self.BLOCKED_MESSAGE_PATTERNS:
-            if pattern.match(msg_type):
-                return True
-        return False
+        if msg_type in self.BLOCKED_MESSAGE_LITERALS:
+            return True
+        # Check prefix blocks
+        return msg_type.startswith(self.BLOCKED_MESSAGE_PREFIXES)
 
     def _is_event_type_allowed(self, event_type: str) -> bool:
         """Check if an event type is allowed for subscribe_events."""
@@ -255,17 +342,9 @@ class WebSocketFilter:
 
     def _create_error_response(self, msg_id: int, message: str) -> str:
         """Create a WebSocket error response."""
-        return json.dumps(
-            {
-                "id": msg_id,
-                "type": "result",
-                "success": False,
-                "error": {
-                    "code": "not_allowed",
-                    "message": message,
-                },
-            }
-        )
+        # Only the ID and message vary, so fill them into a pre-built envelope
+        id_json = str(msg_id) if type(msg_id) is int else orjson.dumps(msg_id).decode()
+        return ERROR_RESPONSE_TEMPLATE % (id_json, orjson.dumps(message).decode())
 
     def filter_client_message(self, message: str) -> tuple[bool, str | None]:
         """
@@ -279,74 +358,98 @@ class WebSocketFilter:
             If allowed is True, error_response is None.
             If allowed is False, error_response contains the JSON error to send back.
         """
+        # Recognise small control frames without parsing them. The raw type is only
+        # trusted with no escapes and a single "type" key, so a duplicate or escaped
+        # key can't smuggle a different type past the check
+        if (
+            len(message) <= MESSAGE_TYPE_PROBE_LIMIT
+            and "\\" not in message
+            and message.count('"type"') == 1
+        ):
+            match = MESSAGE_TYPE_RE.search(message)
+            if match and match.group(1) in self.PASSTHROUGH_MESSAGE_TYPES:
+                return True, None
+
         try:
-            data = json.loads(message)
-        except json.JSONDecodeError:
+            data = orjson.loads(message)
+        except orjson.JSONDecodeError:
             # Let malformed messages pass through - HA will handle them
             return True, None
 
         msg_type = data.get("type")
         msg_id = data.get("id")
 
-        logger.debug(f"Client WS message: type={msg_type}, id={msg_id}")
+        logger.debug("Client WS message: type=%s, id=%s", msg_type, msg_id)
 
         # === SECURITY: Block dangerous message types ===
         if msg_type and self._is_message_type_blocked(msg_type):
-            logger.warning(f"Blocked dangerous message type: {msg_type}")
+            logger.warning("Blocked dangerous message type: %s", msg_type)
             return False, self._create_error_response(
                 msg_id, f"Message type not allowed: {msg_type}"
             )
 
+        handler = self._client_handlers.get(msg_type)
+        if handler is None:
+            return True, None
+        return handler(data, msg_type, msg_id)
+
+    def _handle_subscribe_events(
+        self, data: dict[str, Any], msg_type: str, msg_id: Any
+    ) -> tuple[bool, str | None]:
+        """Validate the event type of a subscribe_events message."""
         # === SECURITY: Validate subscribe_events ===
-        if msg_type == "subscribe_events":
-            event_type = data.get("event_type")
-            if event_type is None:
-                # Subscribing to ALL events is not allowed
-                logger.warning("Blocked subscribe_events without event_type (subscribes to all)")
-                return False, self._create_error_response(
-                    msg_id, "subscribe_events requires event_type parameter"
-                )
-            if not self._is_event_type_allowed(event_type):
-                logger.warning(f"Blocked subscribe_events for event_type: {event_type}")
-                return False, self._create_error_response(
-                    msg_id, f"Event type not allowed: {event_type}"
-                )
+        event_type = data.get("event_type")
+        if event_type is None:
+            # Subscribing to ALL events is not allowed
+            logger.warning("Blocked subscribe_events without event_type (subscribes to all)")
+            return False, self._create_error_response(
+                msg_id, "subscribe_events requires event_type parameter"
+            )
+        if not self._is_event_type_allowed(event_type):
+            logger.warning("Blocked subscribe_events for event_type: %s", event_type)
+            return False, self._create_error_response(
+                msg_id, f"Event type not allowed: {event_type}"
+            )
+        return True, None
+
+    def _track_request(
+        self, data: dict[str, Any], msg_type: str, msg_id: Any
+    ) -> tuple[bool, str | None]:
+        """Track a request whose response needs filtering."""
+        if msg_id is None:
+            return True, None
+        pending = self._pending_requests
+        if len(pending) >= MAX_TRACKED_REQUESTS and msg_id not in pending:
+            logger.warning("Blocked %s: too many pending filtered requests", msg_type)
+            return False, self._create_error_response(msg_id, "Too many pending filtered requests")
+        logger.info("Tracking request for filtering: id=%s, type=%s", msg_id, msg_type)
+        pending[msg_id] = msg_type
+        return True, None
 
-        # Track requests that need response filtering
-        if msg_type in self.ENTITY_LIST_TYPES and msg_id is not None:
-            logger.info(f"Tracking entity request for filtering: id={msg_id}, type={msg_type}")
-            self._pending_requests[msg_id] = msg_type
-
-        # Track device requests that need response filtering
-        if msg_type in self.DEVICE_LIST_TYPES and msg_id is not None:
-            logger.info(f"Tracking device request for filtering: id={msg_id}, type={msg_type}")
-            self._pending_requests[msg_id] = msg_type
-
-        # Track area requests that need response filtering
-        if msg_type in self.AREA_LIST_TYPES and msg_id is not None:
-            logger.info(f"Tracking area request for filtering: id={msg_id}, type={msg_type}")
-            self._pending_requests[msg_id] = msg_type
-
-        # Track floor requests that need response filtering
-        if msg_type in self.FLOOR_LIST_TYPES and msg_id is not None:
-            logger.info(f"Tracking floor request for filtering: id={msg_id}, type={msg_type}")
-            self._pending_requests[msg_id] = msg_type
-
-        # Track entity subscriptions for event filtering
-        if msg_type in self.ENTITY_SUBSCRIPTION_TYPES and msg_id is not None:
-            logger.info(f"Tracking entity subscription: id={msg_id}, type={msg_type}")
-            self._entity_subscriptions.add(msg_id)
-
-        # === Filter call_service messages ===
-        if msg_type != "call_service":
+    def _track_entity_subscription(
+        self, data: dict[str, Any], msg_type: str, msg_id: Any
+    ) -> tuple[bool, str | None]:
+        """Track an entity subscription whose events need filtering."""
+        if msg_id is None:
             return True, None
+        subscriptions = self._entity_subscriptions
+        if len(subscriptions) >= MAX_ENTITY_SUBSCRIPTIONS and msg_id not in subscriptions:
+            logger.warning("Blocked %s: too many entity subscriptions", msg_type)
+            return False, self._create_error_response(msg_id, "Too many entity subscriptions")
+        logger.info("Tracking entity subscription: id=%s, type=%s", msg_id, msg_type)
+        subscriptions.add(msg_id)
+        return True, None
 
+    def _handle_call_service(
+        self, data: dict[str, Any], msg_type: str, msg_id: Any
+    ) -> tuple[bool, str | None]:
+        """Validate the service and targets of a call_service message."""
         domain = data.get("domain", "")
         service = data.get("service", "")
 
         # === SECURITY: Block dangerous services ===
         if self._is_service_blocked(domain, service):
-            logger.warning(f"Blocked dangerous service: {domain}.{service}")
+            logger.warning("Blocked dangerous service: %s.%s", domain, service)
             return False, self._create_error_response(
                 msg_id, f"Service not allowed: {domain}.{service}"
             )
@@ -355,35 +458,43 @@ class WebSocketFilter:
         entities, devices, areas = self._extract_ids_from_target(data)
 
         # === SECURITY: Validate entities ===
-        blocked_entities = [e for e in entities if not self.whitelist.is_entity_allowed(e)]
-        if blocked_entities:
+        whitelist = self.whitelist
+        blocked_entity = next((e for e in entities if not whitelist.is_entity_allowed(e)), None)
+        if blocked_entity is not None:
             logger.warning(
-                f"Blocked WebSocket call_service {domain}.{service} "
-                f"for entities: {blocked_entities}"
+                "Blocked WebSocket call_service %s.%s for entity: %s",
+                domain,
+                service,
+                blocked_entity,
             )
             return False, self._create_error_response(
-                msg_id, f"Entity not in whitelist: {blocked_entities[0]}"
+                msg_id, f"Entity not in whitelist: {blocked_entity}"
             )
 
         # === SECURITY: Validate devices ===
-        blocked_devices = [d for d in devices if not self.whitelist.is_device_allowed(d)]
-        if blocked_devices:
+        blocked_device = next((d for d in devices if not whitelist.is_device_allowed(d)), None)
+        if blocked_device is not None:
             logger.warning(
-                f"Blocked WebSocket call_service {domain}.{service} "
-                f"for devices: {blocked_devices}"
+                "Blocked WebSocket call_service %s.%s for device: %s",
+                domain,
+                service,
+                blocked_device,
             )
             return False, self._create_error_response(
-                msg_id, f"Device not in whitelist: {blocked_devices[0]}"
+                msg_id, f"Device not in whitelist: {blocked_device}"
             )
 
         # === SECURITY: Validate areas ===
-        blocked_areas = [a for a in areas if not self.whitelist.is_area_allowed(a)]
-        if blocked_areas:
+        blocked_area = next((a for a in areas if not whitelist.is_area_allowed(a)), None)
+        if blocked_area is not None:
             logger.warning(
-                f"Blocked WebSocket call_service {domain}.{service} " f"for areas: {blocked_areas}"
+                "Blocked WebSocket call_service %s.%s for area: %s",
+                domain,
+                service,
+                blocked_area,
             )
             return False, self._create_error_response(
-                msg_id, f"Area not in whitelist: {blocked_areas[0]}"
+                msg_id, f"Area not in whitelist: {blocked_area}"
             )
 
         # === SECURITY: For entity-controlled domains, require explicit targets ===
@@ -391,76 +502,49 @@ class WebSocketFilter:
             if not entities and not devices and not areas:
                 # No targets specified - this could affect ALL entities in the domain
                 logger.warning(
-                    f"Blocked WebSocket call_service {domain}.{service} "
-                    f"with no explicit targets (would affect all {domain} entities)"
+                    "Blocked WebSocket call_service %s.%s "
+                    "with no explicit targets (would affect all %s entities)",
+                    domain,
+                    service,
+                    domain,
                 )
                 err = f"Service {domain}.{service} requires explicit targets"
                 return False, self._create_error_response(msg_id, err)
 
         return True, None
 
-    def _filter_entity_list(self, result: list[Any], request_type: str) -> list[Any]:
-        """Filter a list of entities based on whitelist."""
-        filtered = []
-        for item in result:
-            if not isinstance(item, dict):
-                continue
-
-            # get_states returns state objects with entity_id
-            # entity_registry returns registry entries with entity_id
-            entity_id = item.get("entity_id")
-            if entity_id and self.whitelist.is_entity_allowed(entity_id):
-                filtered.append(item)
-
-        original_count = len(result)
-        filtered_count = len(filtered)
-        if original_count != filtered_count:
-            logger.info(
-                f"Filtered {request_type} response: "
-                f"{filtered_count}/{original_count} entities allowed"
-            )
-
-        return filtered
-
-    def _filter_device_list(self, result: list[Any], request_type: str) -> list[Any]:
-        """Filter a list of devices based on whitelist."""
-        filtered = []
-        for item in result:
-            if not isinstance(item, dict):
-                continue
-
-            # device_registry returns devices with id field
-            device_id = item.get("id")
-            if device_id and self.whitelist.is_device_allowed(device_id):
-                filtered.append(item)
-
-        original_count = len(result)
-        filtered_count = len(filtered)
-        if original_count != filtered_count:
-            logger.info(
-                f"Filtered {request_type} response: "
-                f"{filtered_count}/{original_count} devices allowed"
-            )
-
-        return filtered
-
-    def _filter_area_list(self, result: list[Any], request_type: str) -> list[Any]:
-        """Filter a list of areas based on whitelist."""
-        filtered = []
-        for item in result:
-            if not isinstance(item, dict):
-                continue
-
-            # area_registry returns areas with area_id field
-            area_id = item.get("area_id")
-            if area_id and self.whitelist.is_area_allowed(area_id):
-                filtered.append(item)
+    def _filter_list(
+        self,
+        result: list[Any],
+        request_type: str,
+        id_field: str,
+        is_allowed: Callable[[str], bool],
+        noun: str,
+    ) -> list[Any]:
+        """Filter a list of registry items (or states) by the whitelist check on id_field."""
+        try:
+            # HA always returns dicts here, so skip the per-item type check
+            filtered = [
+                item for item in result if (item_id := item.get(id_field)) and is_allowed(item_id)
+            ]
+        except AttributeError:
+            filtered = [
+                item
+                for item in result
+                if isinstance(item, dict)
+                and (item_id := item.get(id_field))
+                and is_allowed(item_id)
+            ]
 
         original_count = len(result)
         filtered_count = len(filtered)
         if original_count != filtered_count:
             logger.info(
-                f"Filtered {request_type} response: {filtered_count}/{original_count} areas allowed"
+                "Filtered %s response: %d/%d %s allowed",
+                request_type,
+                filtered_count,
+                original_count,
+                noun,
             )
 
         return filtered
@@ -470,8 +554,9 @@ class WebSocketFilter:
         # If no areas are whitelisted, show no floors
         if not self.whitelist.areas:
             logger.info(
-                f"Filtered {request_type} response: "
-                f"0/{len(result)} floors allowed (no areas whitelisted)"
+                "Filtered %s response: 0/%d floors allowed (no areas whitelisted)",
+                request_type,
+                len(result),
             )
             return []
 
@@ -487,20 +572,23 @@ class WebSocketFilter:
         - a: additions (new entities)
         - c: changes (state changes)
         - r: removals
+
+        Returns the event itself if nothing was filtered out, a new filtered event
+        otherwise, or None if nothing is left to send.
         """
         filtered_event = {}
         total_original = 0
         total_filtered = 0
+        is_allowed = self.whitelist.is_entity_allowed
 
         # Filter additions
         if "a" in event and isinstance(event["a"], dict):
             original = event["a"]
             total_original += len(original)
-            filtered = {
-                eid: state
-                for eid, state in original.items()
-                if self.whitelist.is_entity_allowed(eid)
-            }
+            if all(map(is_allowed, original)):
+                filtered = original
+            else:
+                filtered = {eid: state for eid, state in original.items() if is_allowed(eid)}
             total_filtered += len(filtered)
             if filtered:
                 filtered_event["a"] = filtered
@@ -509,11 +597,10 @@ class WebSocketFilter:
         if "c" in event and isinstance(event["c"], dict):
             original = event["c"]
             total_original += len(original)
-            filtered = {
-                eid: state
-                for eid, state in original.items()
-                if self.whitelist.is_entity_allowed(eid)
-            }
+            if all(map(is_allowed, original)):
+                filtered = original
+            else:
+                filtered = {eid: state for eid, state in original.items() if is_allowed(eid)}
             total_filtered += len(filtered)
             if filtered:
                 filtered_event["c"] = filtered
@@ -522,27 +609,39 @@ class WebSocketFilter:
         if "r" in event and isinstance(event["r"], list):
             original = event["r"]
             total_original += len(original)
-            filtered = [eid for eid in original if self.whitelist.is_entity_allowed(eid)]
+            if all(map(is_allowed, original)):
+                filtered = original
+            else:
+                filtered = [eid for eid in original if is_allowed(eid)]
             total_filtered += len(filtered)
             if filtered:
                 filtered_event["r"] = filtered
 
         if total_original != total_filtered:
             logger.debug(
-                f"Filtered subscribe_entities event: {total_filtered}/{total_original} entities"
+                "Filtered subscribe_entities event: %d/%d entities",
+                total_filtered,
+                total_original,
             )
 
         # Return None if nothing left to send
         if not filtered_event:
             return None
 
+        # Hand back the original event when every part survived untouched
+        if len(filtered_event) == len(event) and all(
+            value is event[key] for key, value in filtered_event.items()
+        ):
+            return event
+
         return filtered_event
 
-    def _filter_single_message(self, data: dict[str, Any]) -> dict[str, Any] | None:
+    def _filter_single_message(self, data: dict[str, Any]) -> tuple[dict[str, Any] | None, bool]:
         """
-        Filter a single message, potentially modifying result content.
+        Filter a single message, potentially modifying result content in place.
 
-        Returns the (possibly modified) message dict, or None if should be dropped entirely.
+        Returns a tuple of (message dict or None if it should be dropped entirely,
+        whether the message was modified).
         """
         msg_type = data.get("type")
         msg_id = data.get("id")
@@ -554,22 +653,25 @@ class WebSocketFilter:
 
             if isinstance(result, list):
                 # Filter based on request type
-                if request_type in self.DEVICE_LIST_TYPES:
-                    filtered_result = self._filter_device_list(result, request_type)
-                elif request_type in self.AREA_LIST_TYPES:
-                    filtered_result = self._filter_area_list(result, request_type)
-                elif request_type in self.FLOOR_LIST_TYPES:
+                if request_type in self.FLOOR_LIST_TYPES:
                     filtered_result = self._filter_floor_list(result, request_type)
                 else:
-                    filtered_result = self._filter_entity_list(result, request_type)
-                # Return modified copy
-                return {**data, "result": filtered_result}
-
-            return data
+                    id_field, predicate, noun = self.LIST_FILTERS[request_type]
+                    filtered_result = self._filter_list(
+                        result, request_type, id_field, getattr(self.whitelist, predicate), noun
+                    )
+                # Filters only ever drop items, so an equal length means nothing changed
+                if len(filtered_result) == len(result):
+                    return data, False
+                # data was parsed locally for this call, so it is safe to modify
+                data["result"] = filtered_result
+                return data, True
+
+            return data, False
 
         # Filter event messages
         if msg_type != "event":
-            return data
+            return data, False
 
         event = data.get("event", {})
 
@@ -579,28 +681,31 @@ class WebSocketFilter:
             if "a" in event or "c" in event or "r" in event:
                 filtered_event = self._filter_subscribe_entities_event(event)
                 if filtered_event is None:
-                    return None
-                return {**data, "event": filtered_event}
+                    return None, True
+                if filtered_event is event:
+                    return data, False
+                data["event"] = filtered_event
+                return data, True
             # Initial result for subscribe_entities might also need filtering
-            return data
+            return data, False
 
         event_type = event.get("event_type")
 
         # Only filter state_changed events
         if event_type != "state_changed":
-            return data
+            return data, False
 
         event_data = event.get("data", {})
         entity_id = event_data.get("entity_id")
 
         if not entity_id:
-            return data
+            return data, False
 
         if not self.whitelist.is_entity_allowed(entity_id):
-            logger.debug(f"Filtered state_changed event for entity: {entity_id}")
-            return None
+            logger.debug("Filtered state_changed event for entity: %s", entity_id)
+            return None, True
 
-        return data
+        return data, False
 
     def filter_server_message(self, message: str) -> str | None:
         """
@@ -612,36 +717,36 @@ class WebSocketFilter:
         Returns:
             The message to forward, or None to drop it.
         """
+        # Only events and results for tracked requests are ever filtered; skip parsing
+        # anything else (pongs, auth, untracked results), the bulk of non-event traffic
+        if not self._pending_requests:
+            if '"event"' not in message:
+                return message
+            # Without entity subscriptions only state_changed events are filtered, and
+            # HA's encoder never escapes ASCII, so the raw event type is visible here
+            if not self._entity_subscriptions and '"state_changed"' not in message:
+                return message
+
         try:
-            data = json.loads(message)
-        except json.JSONDecodeError:
+            data = orjson.loads(message)
+        except orjson.JSONDecodeError:
             # Let malformed messages pass through
             return message
 
         # HA can send batched messages as arrays
         if isinstance(data, list):
-            filtered = []
-            modified = False
-            for msg in data:
-                result = self._filter_single_message(msg)
-                if result is None:
-                    modified = True
-                elif result is not msg:
-                    filtered.append(result)
-                    modified = True
-                else:
-                    filtered.append(msg)
-
+            results = [self._filter_single_message(msg) for msg in data]
+            if not any(modified for _, modified in results):
+                return message  # Nothing filtered, return original
+            filtered = [result for result, _ in results if result is not None]
             if not filtered:
                 return None
-            if not modified:
-                return message  # Nothing filtered, return original
-            return json.dumps(filtered)
+            return orjson.dumps(filtered).decode()
 
         # Single message
-        result = self._filter_single_message(data)
+        result, modified = self._filter_single_message(data)
         if result is None:
             return None
-        if result is not data:
-            return json.dumps(result)
+        if modified:
+            return orjson.dumps(result).decode()
         return message
@@ -1,6 +1,7 @@
 """Tests for configuration management."""
 
-import tempfile
+import os
+import sys
 from pathlib import Path
 
 from ha_api_limiter.config import WhitelistConfig
@@ -31,12 +32,11 @@ class TestWhitelistConfig:
         wl.load()
         assert wl.endpoints == []
 
-    def test_load_and_save(self):
+    def test_load_and_save(self, tmp_path):
         """Test loading and saving config."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            config_path = Path(tmpdir) / "config.yaml"
-            config_path.write_text(
-                """
+        config_path = tmp_path / "config.yaml"
+        config_path.write_text(
+            """
 endpoints:
   - /api/states
 entities:
@@ -52,17 +52,56 @@ allowed_event_types:
 allowed_services:
   - automation.trigger
 """
-            )
-            wl = WhitelistConfig(config_path)
-            wl.load()
-
-            assert "/api/states" in wl.endpoints
-            assert "light.test" in wl.entities
-            assert "device123" in wl.devices
-            assert "living_room" in wl.areas
-            assert "render_template" in wl.allowed_ws_types
-            assert "custom_event" in wl.allowed_event_types
-            assert "automation.trigger" in wl.allowed_services
+        )
+        wl = WhitelistConfig(config_path)
+        wl.load()
+
+        assert "/api/states" in wl.endpoints
+        assert "light.test" in wl.entities
+        assert "device123" in wl.devices
+        assert "living_room" in wl.areas
+        assert "render_template" in wl.allowed_ws_types
+        assert "custom_event" in wl.allowed_event_types
+        assert "automation.trigger" in wl.allowed_services
+
+    def test_reload_unchanged_file_is_independent(self, tmp_path):
+        """Test that reloads of an unchanged file don't share mutable lists."""
+        config_path = tmp_path / "config.yaml"
+        config_path.write_text("entities:\n  - light.test\n")
+        wl = WhitelistConfig(config_path)
+        wl.load()
+        wl.add_entity("light.added")
+
+        wl2 = WhitelistConfig(config_path)
+        wl2.load()
+        assert wl2.entities == ["light.test"]
+
+        config_path.write_text("entities:\n  - light.test\n  - light.other\n")
+        wl2.load()
+        assert wl2.entities == ["light.test", "light.other"]
+
+    def test_reload_sees_same_size_edit_within_mtime_tick(self, tmp_path):
+        """Test that an edit keeping the size and modification time is still loaded."""
+        config_path = tmp_path / "config.yaml"
+        config_path.write_text("entities:\n  - light.aaaa\n")
+        stat = config_path.stat()
+        wl = WhitelistConfig(config_path)
+        wl.load()
+
+        config_path.write_text("entities:\n  - light.bbbb\n")
+        os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        wl.load()
+        assert wl.entities == ["light.bbbb"]
+
+    def test_loaded_ids_are_interned(self, tmp_path):
+        """Test that exact IDs loaded from the file share the interned copy."""
+        config_path = tmp_path / "config.yaml"
+        config_path.write_text("entities:\n  - light.test\n  - light.*\n")
+        wl = WhitelistConfig(config_path)
+        wl.load()
+
+        (entity,) = wl._entity_set
+        assert entity is sys.intern("".join(["light.", "test"]))
 
     def test_add_endpoint(self):
         """Test adding endpoints."""
@@ -85,6 +124,15 @@ allowed_services:
         # /api/states is covered by /api/*
         assert wl.add_endpoint("/api/states") is False
 
+    def test_add_endpoint_covered_by_new_pattern(self):
+        """Test that a pattern added in the same burst covers later endpoints."""
+        wl = WhitelistConfig()
+        wl._compile_endpoint_patterns()
+
+        assert wl.add_endpoint("/api/*") is True
+        assert wl.add_endpoint("/api/states") is False
+        assert wl.is_endpoint_allowed("/api/states") is True
+
     def test_add_entity(self):
         """Test adding entities."""
         wl = WhitelistConfig()
@@ -133,6 +181,41 @@ allowed_services:
         assert wl.is_endpoint_allowed("/api/services/light/turn_on") is True
         assert wl.is_endpoint_allowed("/api/config") is False
 
+    def test_is_endpoint_allowed_literal_is_exact(self):
+        """Test that literal endpoints match exactly, while templates still match."""
+        wl = WhitelistConfig()
+        wl.endpoints = ["/api/config", "/api/states/{entity_id}"]
+        wl._compile_endpoint_patterns()
+
+        assert wl.is_endpoint_allowed("/api/config") is True
+        assert wl.is_endpoint_allowed("/api/config/core") is False
+        assert wl.is_endpoint_allowed("/api/states/light.kitchen") is True
+
+    def test_is_endpoint_allowed_prefix_wildcard(self):
+        """Test plain prefix wildcards alongside other wildcard shapes."""
+        wl = WhitelistConfig()
+        wl.endpoints = ["/static/*", "/api/history/*/period", "/api/camera_proxy/{entity_id}"]
+        wl._compile_endpoint_patterns()
+
+        assert wl.is_endpoint_allowed("/static/css/style.css") is True
+        assert wl.is_endpoint_allowed("/static") is False
+        assert wl.is_endpoint_allowed("/api/history/x/period") is True
+        assert wl.is_endpoint_allowed("/api/camera_proxy/camera.door") is True
+
+        assert wl.add_endpoint("/frontend_latest/*") is True
+        assert wl.add_endpoint("/frontend_latest/app.js") is False
+        assert wl.add_endpoint("/static/*") is False
+        assert wl.is_endpoint_allowed("/frontend_latest/app.js") is True
+
+    def test_add_templated_endpoint_duplicate(self):
+        """Test that re-adding a templated endpoint is rejected."""
+        wl = WhitelistConfig()
+        wl._compile_endpoint_patterns()
+
+        assert wl.add_endpoint("/api/states/{entity_id}") is True
+        assert wl.add_endpoint("/api/states/{entity_id}") is False
+        assert wl.endpoints == ["/api/states/{entity_id}"]
+
     def test_is_entity_allowed_exact(self):
         """Test exact entity matching."""
         wl = WhitelistConfig()
@@ -152,6 +235,55 @@ allowed_services:
         assert wl.is_entity_allowed("sensor.weather_temperature") is True
         assert wl.is_entity_allowed("sensor.humidity") is False
 
+    def test_is_entity_allowed_many_wildcards(self):
+        """Test matching against several wildcard shapes, including added ones."""
+        wl = WhitelistConfig()
+        wl.entities = ["light.*", "sensor.*_temp*", "switch.plug_?", "cover.[ab]*"]
+
+        assert wl.is_entity_allowed("sensor.kitchen_temperature") is True
+        assert wl.is_entity_allowed("switch.plug_1") is True
+        assert wl.is_entity_allowed("switch.plug_10") is False
+        assert wl.is_entity_allowed("cover.attic") is True
+        assert wl.is_entity_allowed("cover.garage") is False
+
+        assert wl.add_entity("fan.*") is True
+        assert wl.is_entity_allowed("fan.ceiling") is True
+        assert wl.is_entity_allowed("light.kitchen") is True
+
+    def test_is_entity_allowed_after_update(self):
+        """Test that cached entity decisions follow whitelist changes."""
+        wl = WhitelistConfig()
+        assert wl.is_entity_allowed("light.bedroom") is False
+
+        wl.add_entity("light.bedroom")
+        assert wl.is_entity_allowed("light.bedroom") is True
+
+        wl.entities = ["sensor.*"]
+        assert wl.is_entity_allowed("light.bedroom") is False
+        assert wl.is_entity_allowed("sensor.humidity") is True
+
+    def test_is_entity_allowed_subclass_override(self):
+        """Test that the checks are methods that subclasses can override."""
+
+        class DenyAll(WhitelistConfig):
+            def is_entity_allowed(self, entity_id: str) -> bool:
+                return False
+
+        wl = DenyAll()
+        wl.entities = ["light.*"]
+        assert wl.is_entity_allowed("light.kitchen") is False
+        assert wl.add_entity("light.kitchen") is True
+
+    def test_is_endpoint_allowed_after_recompile(self):
+        """Test that cached endpoint decisions follow pattern recompilation."""
+        wl = WhitelistConfig()
+        wl._compile_endpoint_patterns()
+        assert wl.is_endpoint_allowed("/api/config") is False
+
+        wl.endpoints = ["/api/config"]
+        wl._compile_endpoint_patterns()
+        assert wl.is_endpoint_allowed("/api/config") is True
+
     def test_is_device_allowed(self):
         """Test device matching."""
         wl = WhitelistConfig()
@@ -184,38 +316,60 @@ allowed_services:
         assert d["devices"] == ["device123"]
         assert d["areas"] == ["living_room"]
 
-    def test_save_creates_directory(self):
+    def test_to_dict_returns_copies(self):
+        """Test that editing the dict doesn't desync the lists from matching."""
+        wl = WhitelistConfig()
+        wl.entities = ["light.test"]
+
+        wl.to_dict()["entities"].append("light.other")
+        assert wl.entities == ["light.test"]
+        assert wl.is_entity_allowed("light.other") is False
+
+    def test_save_creates_directory(self, tmp_path):
         """Test that save creates parent directory if needed."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            config_path = Path(tmpdir) / "subdir" / "config.yaml"
-            wl = WhitelistConfig(config_path)
-            wl.endpoints = ["/api/test"]
-            wl.save()
+        config_path = tmp_path / "subdir" / "config.yaml"
+        wl = WhitelistConfig(config_path)
+        wl.endpoints = ["/api/test"]
+        wl.save()
 
-            assert config_path.exists()
+        assert config_path.exists()
 
-    def test_save_appends_to_existing(self):
+    def test_save_appends_to_existing(self, tmp_path):
         """Test that save appends to existing file."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            config_path = Path(tmpdir) / "config.yaml"
-            config_path.write_text(
-                """
+        config_path = tmp_path / "config.yaml"
+        config_path.write_text(
+            """
 endpoints:
   - /api/states
 entities: []
 devices: []
 areas: []
 """
-            )
-            wl = WhitelistConfig(config_path)
-            wl.load()
-
-            # Add new endpoint
-            wl.add_endpoint("/api/config")
-            wl.save()
-
-            # Reload and verify
-            wl2 = WhitelistConfig(config_path)
-            wl2.load()
-            assert "/api/states" in wl2.endpoints
-            assert "/api/config" in wl2.endpoints
+        )
+        wl = WhitelistConfig(config_path)
+        wl.load()
+
+        # Add new endpoint
+        wl.add_endpoint("/api/config")
+        wl.save()
+
+        # Reload and verify
+        wl2 = WhitelistConfig(config_path)
+        wl2.load()
+        assert "/api/states" in wl2.endpoints
+        assert "/api/config" in wl2.endpoints
+
+    def test_save_skipped_when_unchanged(self, tmp_path):
+        """Test that save does not rewrite a file that has not changed since load."""
+        config_path = tmp_path / "config.yaml"
+        original = "endpoints:\n- /api/states\nentities: []\n"
+        config_path.write_text(original)
+        wl = WhitelistConfig(config_path)
+        wl.load()
+
+        wl.save()
+        assert config_path.read_text() == original
+
+        wl.add_endpoint("/api/config")
+        wl.save()
+        assert "/api/config" in config_path.read_text()
@@ -1,10 +1,9 @@
 """Tests for learn mode functionality."""
 
 import json
-import tempfile
-from pathlib import Path
-from unittest.mock import MagicMock
+from concurrent.futures import Future
 
+import httpx
 import pytest
 
 from ha_api_limiter.config import WhitelistConfig
@@ -12,13 +11,11 @@ from ha_api_limiter.learner import Learner
 
 
 @pytest.fixture
-def whitelist():
+def whitelist(tmp_path):
     """Create a whitelist for testing."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        config_path = Path(tmpdir) / "config.yaml"
-        wl = WhitelistConfig(config_path)
-        wl._compile_endpoint_patterns()
-        yield wl
+    wl = WhitelistConfig(tmp_path / "config.yaml")
+    wl._compile_endpoint_patterns()
+    return wl
 
 
 @pytest.fixture
@@ -153,6 +150,24 @@ class TestJSONExtraction:
 
         assert len(entities) == 0
 
+    def test_skip_malformed_entity_ids(self, learner):
+        """Test that entity_ids that aren't lowercase domain.object_id are skipped."""
+        data = {
+            "entity_id": [
+                ".kitchen",
+                "light.",
+                "light.kitchen.extra",
+                "Light.Kitchen",
+                "light.küche",
+                "light kitchen.x",
+                "light.kitchen_2",
+            ]
+        }
+        entities, devices, areas = set(), set(), set()
+        learner._extract_ids_from_json(data, entities, devices, areas)
+
+        assert entities == {"light.kitchen_2"}
+
 
 class TestLearnFromRequest:
     """Tests for learning from HTTP requests."""
@@ -182,13 +197,14 @@ class TestLearnFromResponse:
 
     def test_learn_from_json_response(self, learner, whitelist):
         """Test learning from JSON response body."""
-        response = MagicMock()
-        response.headers = {"content-type": "application/json"}
-        response.json.return_value = {
+        payload = {
             "entity_id": "light.discovered",
             "device_id": "device_abc",
             "area_id": "bedroom",
         }
+        response = httpx.Response(
+            200, headers={"content-type": "application/json"}, content=json.dumps(payload).encode()
+        )
 
         learner.learn_from_response(response)
 
@@ -198,8 +214,31 @@ class TestLearnFromResponse:
 
     def test_skip_non_json_response(self, learner, whitelist):
         """Test that non-JSON responses are skipped."""
-        response = MagicMock()
-        response.headers = {"content-type": "text/html"}
+        response = httpx.Response(200, headers={"content-type": "text/html"})
+
+        learner.learn_from_response(response)
+
+        assert len(whitelist.entities) == 0
+
+    def test_learn_from_json_response_with_charset(self, learner, whitelist):
+        """Test that a charset parameter on the content type is accepted."""
+        response = httpx.Response(
+            200,
+            headers={"content-type": "application/json; charset=utf-8"},
+            content=b'{"entity_id": "sensor.charset"}',
+        )
+
+        learner.learn_from_response(response)
+
+        assert "sensor.charset" in whitelist.entities
+
+    def test_skip_json_response_without_ids(self, learner, whitelist):
+        """Test that JSON bodies without ID keys are not parsed."""
+        response = httpx.Response(
+            200,
+            headers={"content-type": "application/json"},
+            content=b'{"message": "API running."}',
+        )
 
         learner.learn_from_response(response)
 
@@ -207,11 +246,9 @@ class TestLearnFromResponse:
 
     def test_handle_invalid_json(self, learner, whitelist):
         """Test handling of invalid JSON responses."""
-        import json as json_module
-
-        response = MagicMock()
-        response.headers = {"content-type": "application/json"}
-        response.json.side_effect = json_module.JSONDecodeError("Invalid", "", 0)
+        response = httpx.Response(
+            200, headers={"content-type": "application/json"}, content=b'{"entity_id": '
+        )
 
         # Should not raise
         learner.learn_from_response(response)
@@ -240,6 +277,35 @@ class TestLearnFromWebSocket:
         assert "ws_device" in whitelist.devices
         assert "ws_area" in whitelist.areas
 
+    def test_learn_from_state_changed_event(self, learner, whitelist):
+        """Test learning the entity from a state_changed event."""
+        message = json.dumps(
+            {
+                "id": 2,
+                "type": "event",
+                "event": {
+                    "event_type": "state_changed",
+                    "data": {
+                        "entity_id": "light.kitchen",
+                        "old_state": {"entity_id": "light.kitchen", "state": "off"},
+                        "new_state": {"entity_id": "light.kitchen", "state": "on"},
+                    },
+                },
+            }
+        )
+
+        learner.learn_from_websocket_message(message)
+
+        assert whitelist.entities == ["light.kitchen"]
+
+    def test_learn_from_parsed_websocket_message(self, learner, whitelist):
+        """Test learning from an already-parsed WebSocket message."""
+        message = {"type": "event", "event": {"entity_id": "sensor.parsed"}}
+
+        learner.learn_from_websocket_message(message)
+
+        assert "sensor.parsed" in whitelist.entities
+
     def test_handle_invalid_websocket_json(self, learner, whitelist):
         """Test handling of invalid WebSocket JSON."""
         message = "not valid json {"
@@ -258,15 +324,21 @@ class TestPeriodicSave:
         learner.maybe_save()
         assert learner._request_count == initial_count + 1
 
-    def test_maybe_save_triggers_at_interval(self, learner, whitelist):
+    def test_maybe_save_triggers_at_interval(self, learner, monkeypatch):
         """Test that save is triggered at interval."""
         learner._save_interval = 3
         learner._request_count = 0
 
         # Mock save
         save_called = []
-        original_save = whitelist.save
-        whitelist.save = lambda: save_called.append(True)
+
+        def save_in_background(self):
+            save_called.append(True)
+            future = Future()
+            future.set_result(None)
+            return future
+
+        monkeypatch.setattr(WhitelistConfig, "save_in_background", save_in_background)
 
         learner.maybe_save()  # count = 1
         learner.maybe_save()  # count = 2
@@ -276,15 +348,67 @@ class TestPeriodicSave:
         assert len(save_called) == 1
         assert learner._request_count == 0  # reset after save
 
-        whitelist.save = original_save
+    def test_maybe_save_skips_clean_whitelist(self, learner, whitelist, monkeypatch):
+        """Test that no save is started when nothing changed since the last one."""
+        learner._save_interval = 1
+        save_called = []
+        monkeypatch.setattr(
+            WhitelistConfig, "save_in_background", lambda self: save_called.append(True)
+        )
+        whitelist._dirty = False
+
+        learner.maybe_save()
+        assert save_called == []
+
+    def test_maybe_save_debounces_bursts(self, learner, whitelist, monkeypatch):
+        """Test that saves closer together than the minimum interval are coalesced."""
+        learner._save_interval = 1
+        save_called = []
+
+        def save_in_background(self):
+            save_called.append(True)
+            future = Future()
+            future.set_result(None)
+            return future
+
+        monkeypatch.setattr(WhitelistConfig, "save_in_background", save_in_background)
+
+        learner.maybe_save()
+        learner.maybe_save()
+        assert len(save_called) == 1
+
+        learner._last_save -= 60
+        learner.maybe_save()
+        assert len(save_called) == 2
+
+    def test_maybe_save_logs_shared_failure_once(self, learner, monkeypatch, caplog):
+        """Test that a save reused by several calls logs its failure only once."""
+        learner._save_interval = 1
+        future = Future()
+        monkeypatch.setattr(WhitelistConfig, "save_in_background", lambda self: future)
 
-    def test_force_save(self, learner, whitelist):
+        learner.maybe_save()
+        learner._last_save -= 60
+        learner.maybe_save()
+        future.set_exception(OSError("disk full"))
+
+        errors = [r for r in caplog.records if r.levelname == "ERROR"]
+        assert len(errors) == 1
+
+    def test_maybe_save_writes_in_background(self, learner, whitelist):
+        """Test that the periodic save writes the whitelist to disk."""
+        learner._save_interval = 1
+        whitelist.add_entity("light.saved")
+
+        learner.maybe_save()
+        whitelist._save_future.result(timeout=5)
+
+        assert "light.saved" in whitelist.config_path.read_text()
+
+    def test_force_save(self, learner, monkeypatch):
         """Test force save."""
         save_called = []
-        original_save = whitelist.save
-        whitelist.save = lambda: save_called.append(True)
+        monkeypatch.setattr(WhitelistConfig, "save", lambda self: save_called.append(True))
 
         learner.save()
         assert len(save_called) == 1
-
-        whitelist.save = original_save
@@ -64,11 +64,53 @@ class TestEndpointAllowance:
         assert result.allowed is False
         assert "endpoint" in result.reason.lower()
 
-    def test_health_endpoint_always_allowed(self, limiter):
-        """Test that /health is always allowed."""
+    def test_health_endpoint_not_special_cased(self, limiter):
+        """Test that /health is left to its own route rather than the whitelist check."""
         result = limiter.check_request("/health", "GET", "")
+        assert result.allowed is False
+
+
+class TestPathEntityFiltering:
+    """Tests for entity-based filtering in request paths."""
+
+    def test_blocked_entity_in_path(self, limiter):
+        """Test that non-whitelisted entities in state paths are blocked."""
+        result = limiter.check_request("/api/states/light.bedroom", "GET", "")
+        assert result.allowed is False
+        assert "light.bedroom" in result.reason
+
+    def test_allowed_entity_in_path(self, limiter):
+        """Test that whitelisted entities in state paths are allowed."""
+        result = limiter.check_request("/api/states/light.kitchen", "GET", "")
         assert result.allowed is True
 
+    def test_entity_with_trailing_newline_blocked(self, limiter):
+        """Test that a decoded %0A after an entity ID can't skip the entity check."""
+        result = limiter.check_request("/api/states/light.bedroom\n", "GET", "")
+        assert result.allowed is False
+
+        result = limiter.check_request("/api/states/light.kitchen\n", "GET", "")
+        assert result.allowed is False
+        assert "newline" in result.reason
+
+    def test_extract_entity_from_camera_proxy_path(self, limiter):
+        """Test that camera proxy paths yield their entity ID."""
+        entity = limiter._extract_entity_from_path("/api/camera_proxy/camera.front_door")
+        assert entity == "camera.front_door"
+
+    def test_extract_entity_rejects_invalid_ids(self, limiter):
+        """Test that malformed entity IDs are not extracted."""
+        for path in [
+            "/api/states/light",
+            "/api/states/.kitchen",
+            "/api/states/light.",
+            "/api/states/Light.kitchen",
+            "/api/states/light2.kitchen",
+            "/api/states/light.kitchen.extra",
+            "/api/states/light.kitchen/attr",
+        ]:
+            assert limiter._extract_entity_from_path(path) is None, path
+
 
 class TestEntityFiltering:
     """Tests for entity-based filtering in query parameters."""
@@ -113,6 +155,39 @@ class TestEntityFiltering:
         )
         assert result.allowed is False
 
+    def test_first_blocked_query_entity_reported(self, limiter):
+        """Test that the scan stops at, and reports, the first blocked entity."""
+        result = limiter.check_request(
+            "/api/history/period/2024-01-01",
+            "GET",
+            "filter_entity_id=light.kitchen,light.bedroom,light.garage",
+        )
+        assert result.allowed is False
+        assert result.reason == "Entity not in whitelist: light.bedroom"
+
+    def test_encoded_query_entity_blocked(self, limiter):
+        """Test that URL-encoded keys and values are decoded before checking."""
+        result = limiter.check_request(
+            "/api/history/period/2024-01-01",
+            "GET",
+            "filter%5Fentity%5Fid=light.living_room%2Clight.bedroom",
+        )
+        assert result.allowed is False
+        assert "light.bedroom" in result.reason
+
+    def test_logbook_entity_param(self, limiter):
+        """Test the entity query parameter on logbook requests."""
+        limiter.whitelist.endpoints.append("/api/logbook/*")
+        limiter.whitelist._compile_endpoint_patterns()
+
+        result = limiter.check_request("/api/logbook/2024-01-01", "GET", "entity=light.kitchen")
+        assert result.allowed is True
+
+        result = limiter.check_request(
+            "/api/logbook/2024-01-01", "GET", "end_time=x&entity=light.bedroom"
+        )
+        assert result.allowed is False
+
     def test_entity_id_param_extracted(self, limiter):
         """Test entity_id query parameter."""
         result = limiter.check_request("/api/states", "GET", "entity_id=light.living_room")
@@ -122,3 +197,24 @@ class TestEntityFiltering:
         """Test that requests without entity params are allowed."""
         result = limiter.check_request("/api/states", "GET", "")
         assert result.allowed is True
+
+
+class TestCheckCache:
+    """Tests for memoized request decisions."""
+
+    def test_repeated_request_uses_cache(self, limiter):
+        """Test that repeated requests are answered from the cache."""
+        limiter.check_request("/api/states", "GET", "")
+        limiter.check_request("/api/states", "GET", "")
+        assert limiter._cached_check.cache_info().hits == 1
+
+    def test_cached_decision_follows_whitelist_changes(self, limiter, whitelist):
+        """Test that whitelist changes bypass stale cached decisions."""
+        path = "/api/states/light.bedroom"
+        assert limiter.check_request(path, "GET", "").allowed is False
+
+        whitelist.add_entity("light.bedroom")
+        assert limiter.check_request(path, "GET", "").allowed is True
+
+        whitelist.entities = ["light.kitchen"]
+        assert limiter.check_request(path, "GET", "").allowed is False
@@ -0,0 +1,44 @@
+"""Tests for the proxy routes."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ha_api_limiter import main
+from ha_api_limiter.config import WhitelistConfig
+from ha_api_limiter.limiter import Limiter
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Create a client for the app in limit mode with an empty whitelist and no upstream."""
+    whitelist = WhitelistConfig()
+    whitelist._compile_endpoint_patterns()
+    monkeypatch.setattr(main, "limiter", Limiter(whitelist))
+    monkeypatch.setattr(main, "proxy", None)
+    return TestClient(main.app)
+
+
+class TestProxyRequest:
+    """Tests for the catch-all proxy route in limit mode."""
+
+    def test_static_asset_skips_whitelist(self, client):
+        """Test that static assets reach the proxy without being whitelisted."""
+        # No upstream is configured, so a request that passes the limiter gets a 503
+        response = client.get("/static/icons/favicon.ico")
+        assert response.status_code == 503
+
+    def test_unlisted_endpoint_blocked(self, client):
+        """Test that other paths are still checked against the whitelist."""
+        response = client.post("/api/services/lock/unlock")
+        assert response.status_code == 403
+
+    def test_dot_segments_under_static_prefix_blocked(self, client):
+        """Test that dot segments can't climb out of an always-allowed prefix."""
+        for path in [
+            "/static/..%2Fapi/services/lock/unlock",
+            "/static/%252e%252e/api/services/lock/unlock",
+            "/frontend_latest/.%2F..%2Fapi/config",
+        ]:
+            response = client.post(path)
+            assert response.status_code == 403, path
+            assert response.json() == {"error": "Path contains dot segments"}
@@ -3,6 +3,7 @@
 import json
 import pytest
 
+from ha_api_limiter import ws_filter as ws_filter_module
 from ha_api_limiter.config import WhitelistConfig
 from ha_api_limiter.ws_filter import WebSocketFilter
 
@@ -69,6 +70,9 @@ class TestBlockedMessageTypes:
             "hassio/info",
             "backup/info",
             "config_entries/get",
+            "auth/sign_path",
+            "auth/refresh_tokens",
+            "auth/delete_refresh_token",
         ],
     )
     def test_blocked_message_patterns(self, ws_filter, msg_type):
@@ -79,6 +83,22 @@ class TestBlockedMessageTypes:
         assert not allowed
         assert error is not None
 
+    @pytest.mark.parametrize(
+        "msg_type",
+        [
+            "auth/sign_path_extra",
+            "config/scenes",
+            "hassio",
+        ],
+    )
+    def test_near_miss_message_types_allowed(self, ws_filter, msg_type):
+        """Test that types only resembling blocked prefixes or names pass."""
+        message = json.dumps({"id": 1, "type": msg_type})
+        allowed, error = ws_filter.filter_client_message(message)
+
+        assert allowed
+        assert error is None
+
     @pytest.mark.parametrize(
         "msg_type",
         [
@@ -96,6 +116,35 @@ class TestBlockedMessageTypes:
         assert error is None
 
 
+class TestPassthroughMessages:
+    """Tests for control frames recognised without parsing."""
+
+    @pytest.mark.parametrize(
+        "message",
+        [
+            '{"type": "ping", "id": 7}',
+            '{"type":"auth","access_token":"abc"}',
+        ],
+    )
+    def test_control_frames_pass(self, ws_filter, message):
+        """Test that ping and auth frames are allowed."""
+        assert ws_filter.filter_client_message(message) == (True, None)
+
+    @pytest.mark.parametrize(
+        "message",
+        [
+            '{"id": 1, "type": "ping", "type": "render_template"}',
+            '{"id": 1, "type": "ping", "typ\\u0065": "render_template"}',
+        ],
+    )
+    def test_smuggled_type_still_blocked(self, ws_filter, message):
+        """Test that a ping type can't hide a later, blocked type key."""
+        allowed, error = ws_filter.filter_client_message(message)
+
+        assert not allowed
+        assert error is not None
+
+
 class TestSubscribeEvents:
     """Tests for subscribe_events validation."""
 
@@ -243,6 +292,22 @@ class TestEntityFiltering:
         assert not allowed
         assert "not in whitelist" in json.loads(error)["error"]["message"]
 
+    def test_first_blocked_entity_reported(self, ws_filter):
+        """Test that the error names the first non-whitelisted entity."""
+        message = json.dumps(
+            {
+                "id": 1,
+                "type": "call_service",
+                "domain": "light",
+                "service": "turn_on",
+                "target": {"entity_id": ["light.kitchen", "light.bedroom", "light.garage"]},
+            }
+        )
+        allowed, error = ws_filter.filter_client_message(message)
+
+        assert not allowed
+        assert json.loads(error)["error"]["message"] == "Entity not in whitelist: light.bedroom"
+
     def test_wildcard_entity_match(self, ws_filter):
         """Test that wildcard patterns match entities."""
         message = json.dumps(
@@ -437,6 +502,20 @@ class TestResponseFiltering:
         assert "sensor.temperature" in entity_ids
         assert "light.bedroom" not in entity_ids
 
+    def test_fully_allowed_response_passes_unchanged(self, ws_filter):
+        """Test that a tracked response with nothing to remove is forwarded as-is."""
+        ws_filter.filter_client_message(json.dumps({"id": 1, "type": "get_states"}))
+
+        response = json.dumps(
+            {
+                "id": 1,
+                "type": "result",
+                "success": True,
+                "result": [{"entity_id": "light.kitchen", "state": "on"}],
+            }
+        )
+        assert ws_filter.filter_server_message(response) is response
+
     def test_filter_device_registry_response(self, ws_filter):
         """Test filtering device registry response."""
         # Track the request
@@ -521,6 +600,39 @@ class TestResponseFiltering:
         # light.living_room and sensor.weather_temp (matches sensor.weather_*)
         assert len(data["result"]) == 2
 
+    def test_non_dict_items_dropped_from_response(self, ws_filter):
+        """Test that malformed list items are dropped rather than breaking the filter."""
+        ws_filter.filter_client_message(json.dumps({"id": 1, "type": "get_states"}))
+
+        response = json.dumps(
+            {
+                "id": 1,
+                "type": "result",
+                "success": True,
+                "result": [{"entity_id": "light.kitchen"}, "light.bedroom", None],
+            }
+        )
+        data = json.loads(ws_filter.filter_server_message(response))
+
+        assert data["result"] == [{"entity_id": "light.kitchen"}]
+
+    def test_tracked_requests_are_bounded(self, ws_filter, monkeypatch):
+        """Test that new tracked requests are refused once the limit is reached."""
+        monkeypatch.setattr(ws_filter_module, "MAX_TRACKED_REQUESTS", 2)
+        for msg_id in (1, 2):
+            allowed, _ = ws_filter.filter_client_message(
+                json.dumps({"id": msg_id, "type": "get_states"})
+            )
+            assert allowed
+
+        allowed, error = ws_filter.filter_client_message(
+            json.dumps({"id": 3, "type": "get_states"})
+        )
+        assert not allowed
+        assert json.loads(error)["id"] == 3
+        # Earlier requests are still tracked, so their responses are still filtered
+        assert ws_filter._pending_requests == {1: "get_states", 2: "get_states"}
+
 
 class TestEventFiltering:
     """Tests for filtering event messages."""
@@ -591,6 +703,109 @@ class TestEventFiltering:
         assert "sensor.temperature" in data["event"]["c"]
         assert "sensor.secret" not in data["event"]["c"]
 
+    def test_untracked_result_passes_unchanged(self, ws_filter):
+        """Test that results for untracked requests are forwarded as-is."""
+        message = json.dumps({"id": 3, "type": "result", "success": True, "result": None})
+        assert ws_filter.filter_server_message(message) is message
+
+    def test_unfilterable_event_not_parsed(self, ws_filter, monkeypatch):
+        """Test that events no filter applies to are forwarded without parsing."""
+
+        def fail_loads(message):
+            raise AssertionError("message should not be parsed")
+
+        monkeypatch.setattr(ws_filter_module.orjson, "loads", fail_loads)
+        message = json.dumps(
+            {"id": 3, "type": "event", "event": {"event_type": "themes_updated", "data": {}}}
+        )
+        assert ws_filter.filter_server_message(message) is message
+
+    def test_batched_event_filtered(self, ws_filter):
+        """Test that events inside a batched array are still filtered."""
+        message = json.dumps(
+            [
+                {"id": 3, "type": "result", "success": True, "result": None},
+                {
+                    "id": 1,
+                    "type": "event",
+                    "event": {
+                        "event_type": "state_changed",
+                        "data": {"entity_id": "light.bedroom"},
+                    },
+                },
+            ]
+        )
+        filtered = ws_filter.filter_server_message(message)
+
+        assert [m["type"] for m in json.loads(filtered)] == ["result"]
+
+    def test_fully_allowed_subscribe_entities_event_unchanged(self, ws_filter):
+        """Test that a subscribe_entities event with only allowed entities is forwarded as-is."""
+        ws_filter.filter_client_message(json.dumps({"id": 5, "type": "subscribe_entities"}))
+
+        message = json.dumps(
+            {
+                "id": 5,
+                "type": "event",
+                "event": {
+                    "a": {"light.living_room": {"s": "on"}},
+                    "c": {"sensor.temperature": {"+": {"s": "23"}}},
+                    "r": ["light.kitchen"],
+                },
+            }
+        )
+        assert ws_filter.filter_server_message(message) is message
+
+    def test_subscribe_entities_event_all_blocked_dropped(self, ws_filter):
+        """Test that a subscribe_entities event with only blocked entities is dropped."""
+        ws_filter.filter_client_message(json.dumps({"id": 5, "type": "subscribe_entities"}))
+
+        message = json.dumps(
+            {"id": 5, "type": "event", "event": {"c": {"light.bedroom": {"+": {"s": "on"}}}}}
+        )
+        assert ws_filter.filter_server_message(message) is None
+
+    def test_entity_subscriptions_are_bounded(self, ws_filter, monkeypatch):
+        """Test that new entity subscriptions are refused once the limit is reached."""
+        monkeypatch.setattr(ws_filter_module, "MAX_ENTITY_SUBSCRIPTIONS", 1)
+        allowed, _ = ws_filter.filter_client_message(
+            json.dumps({"id": 1, "type": "subscribe_entities"})
+        )
+        assert allowed
+
+        allowed, _ = ws_filter.filter_client_message(
+            json.dumps({"id": 2, "type": "subscribe_entities"})
+        )
+        assert not allowed
+        assert ws_filter._entity_subscriptions == {1}
+
+    def test_unsubscribe_keeps_filtering_subscription(self, ws_filter):
+        """Test that a sent unsubscribe doesn't stop filtering, since HA may reject it."""
+        ws_filter.filter_client_message(json.dumps({"id": 5, "type": "subscribe_entities"}))
+
+        allowed, _ = ws_filter.filter_client_message(
+            json.dumps({"id": 1, "type": "unsubscribe_events", "subscription": 5})
+        )
+        assert allowed
+        assert ws_filter._entity_subscriptions == {5}
+
+        message = json.dumps(
+            {"id": 5, "type": "event", "event": {"c": {"lock.front_door": {"+": {"s": "on"}}}}}
+        )
+        assert ws_filter.filter_server_message(message) is None
+
+    def test_entity_subscriptions_are_per_filter(self, ws_filter, whitelist, monkeypatch):
+        """Test that one connection's subscriptions don't count against another's."""
+        monkeypatch.setattr(ws_filter_module, "MAX_ENTITY_SUBSCRIPTIONS", 1)
+        ws_filter.filter_client_message(json.dumps({"id": 1, "type": "subscribe_entities"}))
+
+        other = WebSocketFilter(whitelist)
+        allowed, _ = other.filter_client_message(
+            json.dumps({"id": 7, "type": "subscribe_entities"})
+        )
+        assert allowed
+        assert other._entity_subscriptions == {7}
+
 
 class TestMalformedMessages:
     """Tests for handling malformed messages."""
@@ -611,6 +826,16 @@ class TestMalformedMessages:
         assert allowed
         assert error is None
 
+    def test_blocked_message_with_non_integer_id(self, ws_filter):
+        """Test that the error response echoes a non-integer ID as valid JSON."""
+        message = json.dumps({"id": 'a"b', "type": "render_template"})
+        allowed, error = ws_filter.filter_client_message(message)
+
+        assert not allowed
+        error_data = json.loads(error)
+        assert error_data["id"] == 'a"b'
+        assert error_data["error"]["code"] == "not_allowed"
+
 
 class TestConfigOverrides:
     """Tests for configuration-based security overrides."""
@@ -725,3 +950,13 @@ class TestConfigOverrides:
 
         assert allowed
         assert error is None
+
+    def test_override_change_applies_to_cached_decision(self, ws_filter, whitelist):
+        """Test that changing overrides bypasses previously cached block decisions."""
+        message = json.dumps({"id": 1, "type": "render_template", "template": ""})
+        allowed, _ = ws_filter.filter_client_message(message)
+        assert not allowed
+
+        whitelist.allowed_ws_types = ["render_template"]
+        allowed, _ = ws_filter.filter_client_message(message)
+        assert allowed